@@ -0,0 +1,94 @@
+"""JSON helpers backed by orjson when it is installed (stdlib otherwise).
+
+Parsers decode every JSONL line and re-encode per-turn timelines, so JSON is the
+dominant cost of a sync. Both backends produce the same data; only whitespace in
+the encoded output differs (orjson emits compact separators).
+"""
+
+import json
+import mmap
+from typing import Any, Iterator, Union
+
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+# orjson.JSONDecodeError subclasses this, so callers can keep a single except clause.
+JSONDecodeError = json.JSONDecodeError
+
+JsonInput = Union[str, bytes, bytearray, memoryview]
+
+
+def _stdlib_loads(data: JsonInput) -> Any:
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _stdlib_dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False)
+
+
+if orjson is not None:
+    _DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def loads(data: JsonInput) -> Any:
+        """Decode JSON from text or UTF-8 bytes."""
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects a few inputs the stdlib accepts (NaN, lone surrogates
+            # from truncated emoji); only treat the document as broken if both do.
+            return _stdlib_loads(data)
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """Encode `obj` as UTF-8 JSON bytes."""
+        try:
+            return orjson.dumps(obj, option=_DUMPS_OPTIONS)
+        except TypeError:
+            # orjson.JSONEncodeError: e.g. integers wider than 64 bits.
+            return _stdlib_dumps(obj).encode("utf-8")
+
+    def dumps(obj: Any) -> str:
+        """Encode `obj` as JSON text (non-ASCII characters are kept as-is)."""
+        return dumps_bytes(obj).decode("utf-8")
+
+else:  # pragma: no cover - exercised only without orjson installed
+    loads = _stdlib_loads
+    dumps = _stdlib_dumps
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """Encode `obj` as UTF-8 JSON bytes."""
+        return _stdlib_dumps(obj).encode("utf-8")
+
+
+def write_jsonl(path, rows) -> None:
+    """Write `rows` as JSON Lines, one document per line."""
+    with open(path, "wb") as f:
+        f.writelines(dumps_bytes(row) + b"\n" for row in rows)
+
+
+def iter_jsonl_lines(path) -> Iterator[tuple[int, int, bytes]]:
+    """Yield `(offset_start, offset_end, line)` for every non-empty line of a file.
+
+    Offsets are byte positions; `offset_end` includes the trailing newline, the
+    same as `f.tell()` after `readline()`. The file is memory-mapped and split on
+    newlines with `mmap.find`, so lines are handed out as raw bytes, undecoded.
+    """
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            return
+    with mm:
+        size = len(mm)
+        pos = 0
+        while pos < size:
+            newline = mm.find(b"\n", pos)
+            line_end = size if newline == -1 else newline
+            end = size if newline == -1 else newline + 1
+            if line_end > pos:
+                yield pos, end, mm[pos:line_end]
+            pos = end
@@ -0,0 +1,34 @@
+"""ISO-8601 / RFC 3339 timestamp parsing for log records.
+
+Every parsed message carries a timestamp like `2025-10-14T12:00:00.000Z`, so this
+sits on the per-record hot path. `ciso8601` is used when installed; otherwise the
+C-implemented `datetime.fromisoformat` does the work.
+"""
+
+import sys
+from datetime import datetime
+from typing import Optional
+
+try:
+    from ciso8601 import parse_datetime as _ciso8601_parse
+except Exception:  # pragma: no cover - optional dependency
+    _ciso8601_parse = None
+
+# From Python 3.11, `fromisoformat` accepts the full RFC 3339 layout (a "Z" suffix,
+# any number of fractional digits); older versions need the suffix rewritten.
+_FROMISOFORMAT_ACCEPTS_Z = sys.version_info >= (3, 11)
+
+
+def parse_iso_timestamp(value: str) -> Optional[datetime]:
+    """Parse an ISO-8601 timestamp string, or return None if it isn't one."""
+    if _ciso8601_parse is not None:
+        try:
+            return _ciso8601_parse(value)
+        except ValueError:
+            pass
+    try:
+        if _FROMISOFORMAT_ACCEPTS_Z:
+            return datetime.fromisoformat(value)
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
@@ -11,9 +11,10 @@ by falling back to `Unknown*` wrappers that preserve the raw payload.
 
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
-from typing import Any, Iterator, Optional
+from typing import Any, Callable, Iterator, Optional
+
+from . import _json
 
 
 JsonDict = dict[str, Any]
@@ -24,7 +25,6 @@ class RolloutLine:
     timestamp: str
     item: "RolloutItem"
     raw: JsonDict
-    raw_line: Optional[str] = None
     offset_start: Optional[int] = None
     offset_end: Optional[int] = None
 
@@ -36,19 +36,18 @@ class RolloutLine:
         if not line:
             return None
         try:
-            raw = json.loads(line)
-        except json.JSONDecodeError:
+            raw = _json.loads(line)
+        except _json.JSONDecodeError:
             return None
         if not isinstance(raw, dict):
             return None
-        return cls.from_dict(raw, raw_line=line, offset_start=offset_start, offset_end=offset_end)
+        return cls.from_dict(raw, offset_start=offset_start, offset_end=offset_end)
 
     @classmethod
     def from_dict(
         cls,
         raw: JsonDict,
         *,
-        raw_line: Optional[str] = None,
         offset_start: Optional[int] = None,
         offset_end: Optional[int] = None,
     ) -> Optional["RolloutLine"]:
@@ -64,27 +63,30 @@ class RolloutLine:
             timestamp=timestamp,
             item=item,
             raw=raw,
-            raw_line=raw_line,
             offset_start=offset_start,
             offset_end=offset_end,
         )
 
 
 def iter_rollout_lines(path) -> Iterator[RolloutLine]:
-    with open(path, "rb") as f:
-        while True:
-            offset_start = f.tell()
-            raw_line = f.readline()
-            if not raw_line:
-                break
-            offset_end = f.tell()
-            try:
-                line = raw_line.decode("utf-8")
-            except UnicodeDecodeError:
-                line = raw_line.decode("utf-8", errors="replace")
-            parsed = RolloutLine.from_json_line(line, offset_start=offset_start, offset_end=offset_end)
-            if parsed is not None:
-                yield parsed
+    for offset_start, offset_end, raw_line in _json.iter_jsonl_lines(path):
+        try:
+            raw = _json.loads(raw_line)
+        except UnicodeDecodeError:
+            # Invalid UTF-8: decode leniently rather than dropping the line.
+            parsed = RolloutLine.from_json_line(
+                raw_line.decode("utf-8", errors="replace"),
+                offset_start=offset_start,
+                offset_end=offset_end,
+            )
+        except _json.JSONDecodeError:
+            continue
+        else:
+            if not isinstance(raw, dict):
+                continue
+            parsed = RolloutLine.from_dict(raw, offset_start=offset_start, offset_end=offset_end)
+        if parsed is not None:
+            yield parsed
 
 
 class RolloutItem:
@@ -92,14 +94,9 @@ class RolloutItem:
 
     @staticmethod
     def parse(item_type: str, payload: Any) -> "RolloutItem":
-        if item_type == "session_meta" and isinstance(payload, dict):
-            return SessionMetaItem.from_payload(payload)
-        if item_type == "turn_context" and isinstance(payload, dict):
-            return TurnContextItem(raw=payload)
-        if item_type == "response_item" and isinstance(payload, dict):
-            return ResponseItemItem.from_payload(payload)
-        if item_type == "event_msg" and isinstance(payload, dict):
-            return EventMsgItem.from_payload(payload)
+        factory = _ROLLOUT_ITEM_FACTORIES.get(item_type)
+        if factory is not None and isinstance(payload, dict):
+            return factory(payload)
         return UnknownRolloutItem(item_type=item_type, raw=payload)
 
 
@@ -159,6 +156,10 @@ class SessionMetaItem(RolloutItem):
 class TurnContextItem(RolloutItem):
     raw: JsonDict
 
+    @classmethod
+    def from_payload(cls, payload: JsonDict) -> "TurnContextItem":
+        return cls(raw=payload)
+
 
 @dataclass(frozen=True)
 class ResponseMessage:
@@ -200,15 +201,9 @@ class EventMsg:
         ev_type = payload.get("type")
         ev_type_str = ev_type if isinstance(ev_type, str) else "unknown"
 
-        if ev_type_str == "user_message":
-            return UserMessageEvent.from_payload(payload)
-        if ev_type_str == "agent_message":
-            return AgentMessageEvent.from_payload(payload)
-        if ev_type_str == "agent_reasoning":
-            return AgentReasoningEvent.from_payload(payload)
-        if ev_type_str == "token_count":
-            return TokenCountEvent.from_payload(payload)
-
+        factory = _EVENT_MSG_FACTORIES.get(ev_type_str)
+        if factory is not None:
+            return factory(payload)
         return UnknownEventMsg(type=ev_type_str, raw=payload)
 
 
@@ -302,3 +297,20 @@ class EventMsgItem(RolloutItem):
 class UnknownRolloutItem(RolloutItem):
     item_type: str
     raw: Any
+
+
+# Type dispatch tables: one hash lookup per line instead of a chain of string
+# compares. Defined last because they reference the classes above.
+_ROLLOUT_ITEM_FACTORIES: dict[str, Callable[[JsonDict], RolloutItem]] = {
+    "session_meta": SessionMetaItem.from_payload,
+    "turn_context": TurnContextItem.from_payload,
+    "response_item": ResponseItemItem.from_payload,
+    "event_msg": EventMsgItem.from_payload,
+}
+
+_EVENT_MSG_FACTORIES: dict[str, Callable[[JsonDict], EventMsg]] = {
+    "user_message": UserMessageEvent.from_payload,
+    "agent_message": AgentMessageEvent.from_payload,
+    "agent_reasoning": AgentReasoningEvent.from_payload,
+    "token_count": TokenCountEvent.from_payload,
+}
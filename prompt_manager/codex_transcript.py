@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import json
 import re
 import shutil
 import textwrap
@@ -10,6 +9,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
+from . import _json
 from .codex_schema import (
     AgentMessageEvent,
     AgentReasoningEvent,
@@ -89,7 +89,7 @@ def extract_turn_view_from_turn_json(turn_json: str) -> Optional[CodexTurnView]:
 
     # turn_json is a JSON array of raw RolloutLine dicts.
     try:
-        timeline_raw = json.loads(turn_json)
+        timeline_raw = _json.loads(turn_json)
     except Exception:
         return None
     if not isinstance(timeline_raw, list):
@@ -1,20 +1,37 @@
 """DuckDB database operations for prompt storage."""
 
 import duckdb
-import json
+import functools
+import logging
 import os
 import sys
+import threading
+import weakref
 import zlib
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 from datetime import datetime
 
+from . import _json
+
+try:
+    import zstandard
+except Exception:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
 _DEFAULT_DB_PATH = Path.home() / ".prompt-manager" / "prompts.duckdb"
 
 
 _INLINE_TEXT_BYTES = int(os.environ.get("PROMPT_MANAGER_INLINE_TEXT_BYTES", "8192"))
 _RESPONSE_PREVIEW_CHARS = int(os.environ.get("PROMPT_MANAGER_RESPONSE_PREVIEW_CHARS", "4000"))
 _COMPRESS_LEVEL = int(os.environ.get("PROMPT_MANAGER_COMPRESS_LEVEL", "1"))
+# Bump when _init_schema gains a migration step so existing databases rerun it.
+_SCHEMA_VERSION = 2
+_ZSTD_LEVEL = int(os.environ.get("PROMPT_MANAGER_ZSTD_LEVEL", "3"))
+# Every zstd frame starts with this magic, which doubles as the codec marker:
+# blobs without it are legacy zlib streams.
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_zstd_local = threading.local()
 
 
 def get_default_db_path() -> Path:
@@ -49,10 +66,136 @@ def _wants_store_blobs() -> bool:
     value = os.environ.get("PROMPT_MANAGER_STORE_BLOBS", "1").strip().lower()
     return value not in {"0", "false", "no", "off"}
 
+def _zstd_codecs() -> tuple["zstandard.ZstdCompressor", "zstandard.ZstdDecompressor"]:
+    # zstandard (de)compressors are reusable but not thread-safe; keep one pair per thread.
+    codecs = getattr(_zstd_local, "codecs", None)
+    if codecs is None:
+        codecs = (zstandard.ZstdCompressor(level=_ZSTD_LEVEL), zstandard.ZstdDecompressor())
+        _zstd_local.codecs = codecs
+    return codecs
+
+
+@functools.lru_cache(maxsize=None)
+def _warn_once(message: str) -> None:
+    logging.warning(message)
+
+
+def _wants_zstd() -> bool:
+    """Whether new blobs are written with zstd instead of zlib (opt-in).
+
+    `zstandard` is not a declared dependency, so zstd blobs could only be read back
+    where it is installed; writing them must be an explicit choice.
+    """
+    value = os.environ.get("PROMPT_MANAGER_ZSTD", "0").strip().lower()
+    if value in {"0", "false", "no", "off", ""}:
+        return False
+    if zstandard is None:
+        _warn_once("PROMPT_MANAGER_ZSTD is set but zstandard is not installed; using zlib")
+        return False
+    return True
+
+
+def _compress_bytes(raw: bytes) -> bytes:
+    if _wants_zstd():
+        return _zstd_codecs()[0].compress(raw)
+    return zlib.compress(raw, level=_COMPRESS_LEVEL)
+
+
+def _wants_fts() -> bool:
+    """Whether to use a DuckDB full-text index for prompt search (opt-in).
+
+    FTS pays off on large databases; small ones are faster with a plain scan and
+    don't need the `fts` extension at all.
+    """
+    value = os.environ.get("PROMPT_MANAGER_FTS", "0").strip().lower()
+    return value not in {"0", "false", "no", "off", ""}
+
+
+# BM25 matches whole tokens, so shorter terms (typically a word still being typed)
+# are searched as substrings instead.
+_FTS_MIN_TERM_CHARS = 3
+
+
+def _uses_fts(query: str) -> bool:
+    terms = query.split()
+    return bool(terms) and all(len(term) >= _FTS_MIN_TERM_CHARS for term in terms)
+
+
+# Connections (or cursors) on which `LOAD fts` was already attempted, so searches
+# try at most once per connection.
+_fts_loaded: "weakref.WeakSet[duckdb.DuckDBPyConnection]" = weakref.WeakSet()
+_fts_failed: "weakref.WeakSet[duckdb.DuckDBPyConnection]" = weakref.WeakSet()
+
+
+def _load_fts_extension(conn: duckdb.DuckDBPyConnection, *, install: bool = False) -> bool:
+    """Load the `fts` extension on `conn`.
+
+    Only `install=True` (index builds) may download the extension; searches never do.
+    """
+    if conn in _fts_loaded:
+        return True
+    if conn in _fts_failed and not install:
+        return False
+    try:
+        conn.execute("LOAD fts")
+    except duckdb.Error:
+        if not install:
+            _fts_failed.add(conn)
+            return False
+        try:
+            conn.execute("INSTALL fts")
+            conn.execute("LOAD fts")
+        except duckdb.Error:
+            _fts_failed.add(conn)
+            return False
+    _fts_failed.discard(conn)
+    _fts_loaded.add(conn)
+    return True
+
+
+def _fts_index_ready(conn: duckdb.DuckDBPyConnection) -> bool:
+    try:
+        row = conn.execute(
+            "SELECT COUNT(*) FROM duckdb_schemas() WHERE schema_name = 'fts_main_prompts'"
+        ).fetchone()
+    except duckdb.Error:
+        return False
+    return bool(row and row[0]) and _load_fts_extension(conn)
+
+
+def refresh_fts_index(conn: duckdb.DuckDBPyConnection) -> bool:
+    """(Re)build the full-text index over prompt content.
+
+    DuckDB FTS indexes are not maintained on insert, so this runs after syncs.
+    Returns False when FTS is disabled or the `fts` extension is unavailable.
+    """
+    if not _wants_fts() or not _load_fts_extension(conn, install=True):
+        return False
+    try:
+        conn.execute(
+            "PRAGMA create_fts_index('prompts', 'id', 'content', stemmer = 'none', overwrite = 1)"
+        )
+    except duckdb.Error:
+        logging.exception("failed to build full-text index")
+        return False
+    return True
+
+
 def _decompress_text(blob: bytes) -> Optional[str]:
+    """Decode a compressed text blob; logs and returns None if it can't be decoded."""
+    if blob[:4] == _ZSTD_MAGIC and zstandard is None:
+        _warn_once(
+            "database contains zstd-compressed text but zstandard is not installed; "
+            "install zstandard to read it (only previews are shown until then)"
+        )
+        return None
     try:
-        raw = zlib.decompress(blob)
+        if blob[:4] == _ZSTD_MAGIC:
+            raw = _zstd_codecs()[1].decompress(blob)
+        else:
+            raw = zlib.decompress(blob)
     except Exception:
+        logging.exception("failed to decompress a %d-byte text blob", len(blob))
         return None
     try:
         return raw.decode("utf-8")
@@ -77,40 +220,69 @@ def _load_jsonl_range_as_array(path: str, start: int, end: int) -> Optional[str]
     except Exception:
         return None
 
+    # Split on b"\n" only and decode once: `str.splitlines` would also break records
+    # at U+2028/U+0085, which JSON strings may contain unescaped.
+    body = b",".join(ln for ln in (raw.strip() for raw in chunk.split(b"\n")) if ln)
+    if not body:
+        return None
+    array = b"[" + body + b"]"
     try:
-        text = chunk.decode("utf-8")
+        return array.decode("utf-8")
     except UnicodeDecodeError:
-        text = chunk.decode("utf-8", errors="replace")
+        return array.decode("utf-8", errors="replace")
+
+def _open_thread(path: str) -> bytes:
+    """Read a thread file's raw bytes (the single I/O point, swappable in tests)."""
+    return Path(path).read_bytes()
 
-    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-    if not lines:
+
+def _parse_amp_thread(path: str) -> Optional[list]:
+    try:
+        data = _open_thread(path)
+    except Exception:
         return None
-    return "[" + ",".join(lines) + "]"
 
-def _load_amp_thread_range_as_array(path: str, start: int, end: int) -> Optional[str]:
     try:
-        start_i = int(start)
-        end_i = int(end)
+        obj = _json.loads(data)
     except Exception:
         return None
+    if not isinstance(obj, dict):
+        return None
 
-    if start_i < 0 or end_i <= start_i:
+    messages = obj.get("messages")
+    if not isinstance(messages, list) or not messages:
         return None
+    return messages
+
+
+@functools.lru_cache(maxsize=16)
+def _parse_amp_thread_cached(path: str, mtime_ns: int) -> Optional[list]:
+    # Several prompts usually point at the same thread file; `mtime_ns` is part of
+    # the cache key so edits to the file invalidate the cached parse.
+    return _parse_amp_thread(path)
 
+
+def _load_amp_thread_messages(path: str) -> Optional[list]:
     try:
-        data = Path(path).read_text(encoding="utf-8")
-    except Exception:
-        return None
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        # Nothing to key a cache entry on; read through uncached.
+        return _parse_amp_thread(path)
+    return _parse_amp_thread_cached(path, mtime_ns)
+
 
+def _load_amp_thread_range_as_array(path: str, start: int, end: int) -> Optional[str]:
     try:
-        obj = json.loads(data)
+        start_i = int(start)
+        end_i = int(end)
     except Exception:
         return None
-    if not isinstance(obj, dict):
+
+    if start_i < 0 or end_i <= start_i:
         return None
 
-    messages = obj.get("messages")
-    if not isinstance(messages, list) or not messages:
+    messages = _load_amp_thread_messages(path)
+    if not messages:
         return None
 
     start_i = min(start_i, len(messages))
@@ -119,33 +291,54 @@ def _load_amp_thread_range_as_array(path: str, start: int, end: int) -> Optional
         return None
 
     try:
-        return json.dumps(messages[start_i:end_i], ensure_ascii=False)
+        return _json.dumps(messages[start_i:end_i])
     except Exception:
         return None
 
 
+def _preview_text(text: Optional[str], raw: Optional[bytes]) -> str:
+    if text is not None:
+        return text[:_RESPONSE_PREVIEW_CHARS]
+    # A UTF-8 code point is at most 4 bytes; only decode what the preview needs.
+    head = raw[: _RESPONSE_PREVIEW_CHARS * 4].decode("utf-8", errors="ignore")
+    return head[:_RESPONSE_PREVIEW_CHARS]
+
+
 def pack_large_text(
-    text: Optional[str],
+    text: Union[str, bytes, memoryview, None],
     *,
     keep_preview: bool = False,
 ) -> tuple[Optional[str], Optional[bytes]]:
-    """Pack a potentially large text field into (inline_text, compressed_blob)."""
+    """Pack a potentially large text field into (inline_text, compressed_blob).
+
+    `text` may also be UTF-8 encoded bytes, which are compressed as-is without a
+    decode/encode round-trip.
+    """
     if text is None:
         return None, None
 
+    raw: Optional[bytes] = None
+    if not isinstance(text, str):
+        raw = bytes(text)
+        text = None
+
     wants_blobs = _wants_store_blobs()
     if not wants_blobs:
         if not keep_preview:
             return None, None
-        preview = text[:_RESPONSE_PREVIEW_CHARS]
-        return preview, None
-
-    raw = text.encode("utf-8")
+        return _preview_text(text, raw), None
+
+    if raw is None:
+        # A UTF-8 code point is at most 4 bytes: short strings are inlined without
+        # encoding them just to measure their size.
+        if len(text) * 4 <= _INLINE_TEXT_BYTES:
+            return text, None
+        raw = text.encode("utf-8")
     if len(raw) <= _INLINE_TEXT_BYTES:
-        return text, None
+        return (text if text is not None else raw.decode("utf-8", errors="replace")), None
 
-    inline = text[:_RESPONSE_PREVIEW_CHARS] if keep_preview else None
-    return inline, zlib.compress(raw, level=_COMPRESS_LEVEL)
+    inline = _preview_text(text, raw) if keep_preview else None
+    return inline, _compress_bytes(raw)
 
 
 def get_connection() -> duckdb.DuckDBPyConnection:
@@ -177,8 +370,23 @@ def get_connection() -> duckdb.DuckDBPyConnection:
     return conn
 
 
+def _schema_is_current(conn: duckdb.DuckDBPyConnection) -> bool:
+    try:
+        row = conn.execute("SELECT max(version) FROM _schema_meta").fetchone()
+    except duckdb.CatalogException:
+        return False  # Created before schema versioning
+    return bool(row) and row[0] == _SCHEMA_VERSION
+
+
 def _init_schema(conn: duckdb.DuckDBPyConnection) -> None:
-    """Initialize the database schema."""
+    """Initialize the database schema.
+
+    Databases already stamped with `_SCHEMA_VERSION` skip the migration steps
+    (column/index probes) entirely.
+    """
+    if _schema_is_current(conn):
+        return
+
     conn.execute("""
         CREATE TABLE IF NOT EXISTS prompts (
             id VARCHAR PRIMARY KEY,
@@ -267,6 +475,28 @@ def _init_schema(conn: duckdb.DuckDBPyConnection) -> None:
         ON prompts(timestamp DESC)
     """)
 
+    # DuckDB does not use ART indexes for ORDER BY/LIMIT, so this (source, timestamp)
+    # index from schema v1 was never read and only cost upkeep on insert.
+    conn.execute("DROP INDEX IF EXISTS idx_prompts_source_ts")
+
+    conn.execute("CREATE TABLE IF NOT EXISTS _schema_meta (version INTEGER)")
+    conn.execute("DELETE FROM _schema_meta")
+    conn.execute("INSERT INTO _schema_meta VALUES (?)", [_SCHEMA_VERSION])
+
+
+_INSERT_PROMPT_SQL = """
+    INSERT INTO prompts (
+        id, source, project_path, session_id, origin_path,
+        origin_offset_start, origin_offset_end,
+        content, timestamp,
+        response, response_blob,
+        turn_json, turn_json_blob
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO NOTHING
+    RETURNING id
+"""
+
 
 def insert_prompt(
     conn: duckdb.DuckDBPyConnection,
@@ -282,27 +512,21 @@ def insert_prompt(
     response: Optional[str] = None,
     turn_json: Optional[str] = None,
     backfill_missing_fields: bool = True,
+    turn_json_bytes: Union[bytes, memoryview, None] = None,
 ) -> bool:
     """Insert a prompt if it doesn't exist.
 
+    `turn_json_bytes` can be passed instead of `turn_json` by callers that already
+    hold the UTF-8 encoded JSON.
+
     Returns:
         True if a new row was inserted, False if it already existed.
     """
+    turn_payload = turn_json if turn_json is not None else turn_json_bytes
     inline_response, response_blob = pack_large_text(response, keep_preview=True)
-    inline_turn_json, turn_blob = pack_large_text(turn_json, keep_preview=False)
+    inline_turn_json, turn_blob = pack_large_text(turn_payload, keep_preview=False)
     inserted = conn.execute(
-        """
-        INSERT INTO prompts (
-            id, source, project_path, session_id, origin_path,
-            origin_offset_start, origin_offset_end,
-            content, timestamp,
-            response, response_blob,
-            turn_json, turn_json_blob
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT (id) DO NOTHING
-        RETURNING id
-        """,
+        _INSERT_PROMPT_SQL,
         [
             id,
             source,
@@ -325,7 +549,7 @@ def insert_prompt(
 
     # Existing prompt: opportunistically fill in missing fields without
     # counting it as a "new prompt" for sync stats.
-    if backfill_missing_fields and (response or turn_json or origin_path):
+    if backfill_missing_fields and (response or turn_payload or origin_path):
         needs_backfill = conn.execute(
             """
             SELECT
@@ -375,6 +599,96 @@ def insert_prompt(
     return False
 
 
+def insert_prompts_bulk(conn: duckdb.DuckDBPyConnection, rows: list[dict]) -> int:
+    """Insert many prompts in one set-based statement, skipping existing ids.
+
+    Each row is a dict with the same keys as `insert_prompt()` arguments (`id`,
+    `source` and `content` are required). Unlike `insert_prompt()`, existing rows
+    are never backfilled.
+
+    Returns:
+        Number of new rows inserted.
+    """
+    return len(insert_prompts_bulk_ids(conn, rows))
+
+
+def insert_prompts_bulk_ids(conn: duckdb.DuckDBPyConnection, rows: list[dict]) -> set[str]:
+    """Like `insert_prompts_bulk()`, but return the ids that were actually inserted."""
+    staged: dict[str, tuple] = {}
+    for row in rows:
+        prompt_id = row["id"]
+        if prompt_id in staged:
+            continue
+        inline_response, response_blob = pack_large_text(row.get("response"), keep_preview=True)
+        inline_turn_json, turn_blob = pack_large_text(row.get("turn_json"), keep_preview=False)
+        staged[prompt_id] = (
+            prompt_id,
+            row["source"],
+            row.get("project_path"),
+            row.get("session_id"),
+            row.get("origin_path"),
+            row.get("origin_offset_start"),
+            row.get("origin_offset_end"),
+            row["content"],
+            row.get("timestamp"),
+            inline_response,
+            response_blob,
+            inline_turn_json,
+            turn_blob,
+        )
+    if not staged:
+        return set()
+
+    conn.execute("DROP TABLE IF EXISTS tmp_bulk_prompts")
+    conn.execute(
+        """
+        CREATE TEMP TABLE tmp_bulk_prompts(
+            id VARCHAR, source VARCHAR, project_path VARCHAR, session_id VARCHAR,
+            origin_path VARCHAR, origin_offset_start BIGINT, origin_offset_end BIGINT,
+            content TEXT, timestamp TIMESTAMP,
+            response TEXT, response_blob BLOB,
+            turn_json TEXT, turn_json_blob BLOB
+        )
+        """
+    )
+    try:
+        conn.executemany(
+            "INSERT INTO tmp_bulk_prompts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            list(staged.values()),
+        )
+        inserted = conn.execute(
+            """
+            INSERT INTO prompts (
+                id, source, project_path, session_id, origin_path,
+                origin_offset_start, origin_offset_end,
+                content, timestamp,
+                response, response_blob,
+                turn_json, turn_json_blob
+            )
+            SELECT * FROM tmp_bulk_prompts
+            ON CONFLICT (id) DO NOTHING
+            RETURNING id
+            """
+        ).fetchall()
+    finally:
+        conn.execute("DROP TABLE IF EXISTS tmp_bulk_prompts")
+    return {row[0] for row in inserted}
+
+
+_SUMMARY_COLUMNS = (
+    "id",
+    "source",
+    "project_path",
+    "session_id",
+    "content",
+    "timestamp",
+    "tags",
+    "starred",
+    "use_count",
+    "created_at",
+)
+
+
 def search_prompt_summaries(
     conn: duckdb.DuckDBPyConnection,
     query: Optional[str] = None,
@@ -392,10 +706,6 @@ def search_prompt_summaries(
     conditions = []
     params = []
 
-    if query:
-        conditions.append("content ILIKE ?")
-        params.append(f"%{query}%")
-
     if source:
         conditions.append("source = ?")
         params.append(source)
@@ -403,6 +713,35 @@ def search_prompt_summaries(
     if starred_only:
         conditions.append("starred = TRUE")
 
+    if query and _wants_fts() and _uses_fts(query) and _fts_index_ready(conn):
+        where_clause = " AND ".join(["score IS NOT NULL"] + conditions)
+        try:
+            result = conn.execute(
+                f"""
+                SELECT id, source, project_path, session_id,
+                       SUBSTR(content, 1, ?) AS content,
+                       timestamp, tags, starred, use_count, created_at
+                FROM (
+                    SELECT *, fts_main_prompts.match_bm25(id, ?, conjunctive := 1) AS score
+                    FROM prompts
+                ) AS ranked
+                WHERE {where_clause}
+                ORDER BY score DESC, timestamp DESC NULLS LAST
+                LIMIT ? OFFSET ?
+                """,
+                [int(snippet_len), query] + params + [limit, offset],
+            ).fetchall()
+        except duckdb.Error:
+            result = None  # Fall back to a substring scan
+        # No whole-word hit usually means a partial word: fall back to a substring
+        # scan (first page only, so later pages keep the ranking of the first).
+        if result or (result is not None and offset):
+            return [dict(zip(_SUMMARY_COLUMNS, row)) for row in result]
+
+    if query:
+        conditions.insert(0, "content ILIKE ?")
+        params.insert(0, f"%{query}%")
+
     where_clause = " AND ".join(conditions) if conditions else "1=1"
 
     result = conn.execute(
@@ -418,19 +757,7 @@ def search_prompt_summaries(
         [int(snippet_len)] + params + [limit, offset],
     ).fetchall()
 
-    columns = [
-        "id",
-        "source",
-        "project_path",
-        "session_id",
-        "content",
-        "timestamp",
-        "tags",
-        "starred",
-        "use_count",
-        "created_at",
-    ]
-    return [dict(zip(columns, row)) for row in result]
+    return [dict(zip(_SUMMARY_COLUMNS, row)) for row in result]
 
 
 def search_prompt_summaries_balanced(
@@ -447,27 +774,34 @@ def search_prompt_summaries_balanced(
     entirely. This helper fetches up to `per_source_limit` rows per source and
     merges them into a single list.
     """
-    out: list[dict] = []
-    seen: set[str] = set()
-
-    for source in sources:
-        rows = search_prompt_summaries(
-            conn,
-            query=None,
-            source=source,
-            starred_only=False,
-            limit=per_source_limit,
-            offset=0,
-            snippet_len=snippet_len,
-        )
-        for row in rows:
-            prompt_id = row.get("id")
-            if not prompt_id or prompt_id in seen:
-                continue
-            seen.add(prompt_id)
-            out.append(row)
+    unique_sources = list(dict.fromkeys(sources))
+    if not unique_sources:
+        return []
+
+    # One top-N branch per source (rather than a window over all rows) so each
+    # branch keeps only `per_source_limit` rows while scanning.
+    branch_sql = """
+        (SELECT ? AS branch, id, source, project_path, session_id,
+                SUBSTR(content, 1, ?) AS content,
+                timestamp, tags, starred, use_count, created_at
+         FROM prompts
+         WHERE source = ?
+         ORDER BY timestamp DESC NULLS LAST
+         LIMIT ?)
+    """
+    params: list = []
+    for branch, source in enumerate(unique_sources):
+        params.extend([branch, int(snippet_len), source, per_source_limit])
 
-    return out
+    result = conn.execute(
+        f"""
+        SELECT * EXCLUDE (branch)
+        FROM ({" UNION ALL ".join([branch_sql] * len(unique_sources))})
+        ORDER BY branch, timestamp DESC NULLS LAST
+        """,
+        params,
+    ).fetchall()
+    return [dict(zip(_SUMMARY_COLUMNS, row)) for row in result]
 
 
 def search_prompts(
@@ -593,11 +927,16 @@ def get_prompt(conn: duckdb.DuckDBPyConnection, prompt_id: str) -> Optional[dict
 
 
 def get_prompt_preview(conn: duckdb.DuckDBPyConnection, prompt_id: str) -> Optional[dict]:
-    """Get prompt fields needed for list/preview views (does not hydrate turn_json)."""
+    """Get prompt fields needed for list/preview views (does not hydrate turn_json).
+
+    When the full response is stored compressed, `response` is only its preview and
+    `response_truncated` is True.
+    """
     result = conn.execute(
         """
         SELECT id, source, project_path, session_id, content, timestamp,
-               tags, starred, use_count, created_at, response
+               tags, starred, use_count, created_at, response,
+               response_blob IS NOT NULL AS response_truncated
         FROM prompts
         WHERE id = ?
         """,
@@ -618,6 +957,7 @@ def get_prompt_preview(conn: duckdb.DuckDBPyConnection, prompt_id: str) -> Optio
         "use_count",
         "created_at",
         "response",
+        "response_truncated",
     ]
     return dict(zip(columns, result))
 
@@ -3,10 +3,14 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
 from typing import Iterator, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 import json
 import hashlib
+import sys
+
+from .. import _json
+from .._time import parse_iso_timestamp
 
 
 @dataclass
@@ -19,9 +23,37 @@ class ParsedPrompt:
     session_id: Optional[str] = None
     timestamp: Optional[datetime] = None
     response: Optional[str] = None
-    turn_json: Optional[str] = None
     origin_offset_start: Optional[int] = None
     origin_offset_end: Optional[int] = None
+    # The turn timeline as built in memory by the parser, if it has one. When given
+    # instead of `turn_json`, the JSON text is only serialized on first access.
+    turn: Optional[list] = None
+    _turn_json: Optional[str] = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        # source/session/project repeat across every prompt of a session (and project
+        # paths across sessions); interning keeps one shared object per distinct value.
+        self.source = sys.intern(self.source)
+        if isinstance(self.session_id, str):
+            self.session_id = sys.intern(self.session_id)
+        if isinstance(self.project_path, str):
+            self.project_path = sys.intern(self.project_path)
+
+    @property
+    def turn_json(self) -> Optional[str]:
+        if self._turn_json is None and self.turn is not None:
+            self._turn_json = _json.dumps(self.turn)
+        return self._turn_json
+
+    @turn_json.setter
+    def turn_json(self, value: Optional[str]) -> None:
+        self._turn_json = value
+
+    def drop_turn(self) -> None:
+        """Keep only the serialized `turn_json`, releasing the in-memory timeline."""
+        if self.turn is not None:
+            self._turn_json = self.turn_json
+            self.turn = None
 
 
 class BaseParser(ABC):
@@ -87,11 +119,10 @@ class BaseParser(ABC):
             if not ts_str:
                 return None
 
-            # Try ISO format with timezone normalization
-            try:
-                return datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-            except ValueError:
-                pass
+            # Try ISO format (RFC 3339, including a "Z" suffix)
+            parsed = parse_iso_timestamp(ts_str)
+            if parsed is not None:
+                return parsed
 
             # Try custom formats
             default_formats = formats or [
@@ -2,12 +2,12 @@
 
 from __future__ import annotations
 
-import json
 import os
 from pathlib import Path
 from typing import Any, Iterator, Optional
 from urllib.parse import unquote, urlparse
 
+from .. import _json
 from . import BaseParser, ParsedPrompt
 
 
@@ -101,7 +101,7 @@ class AmpParser(BaseParser):
 
     def parse_file(self, file_path: Path) -> Iterator[ParsedPrompt]:
         try:
-            data = json.loads(file_path.read_text("utf-8"))
+            data = _json.loads(file_path.read_text("utf-8"))
         except Exception:
             return
 
@@ -159,7 +159,6 @@ class AmpParser(BaseParser):
                 session_id=thread_id,
                 timestamp=timestamp,
                 response=response or None,
-                turn_json=None,
                 origin_offset_start=start_idx,
                 origin_offset_end=end_idx,
             )
@@ -1,11 +1,27 @@
 """Parser for Claude Code logs."""
 
-import json
+import re
 from pathlib import Path
 from typing import Any, Iterator, Optional
 
+from .. import _json
 from . import BaseParser, ParsedPrompt
 
+_LOCAL_COMMAND_MARKERS = (
+    "<local-command-caveat>",
+    "<command-name>",
+    "<command-message>",
+    "<command-args>",
+    "<local-command-stdout>",
+    "<local-command-stderr>",
+)
+# One search per line instead of a substring scan per marker.
+_LOCAL_COMMAND_RE = re.compile("|".join(map(re.escape, _LOCAL_COMMAND_MARKERS)))
+_LOCAL_COMMAND_RE_BYTES = re.compile(_LOCAL_COMMAND_RE.pattern.encode("utf-8"))
+# `isMeta` events (command caveats, injected context) never start a prompt or carry
+# assistant text, so they are recognised on the raw line before decoding it.
+_META_LINE_RE = re.compile(rb'"isMeta": ?true')
+
 
 class ClaudeCodeParser(BaseParser):
     """Parser for Claude Code JSONL logs.
@@ -53,18 +69,12 @@ class ClaudeCodeParser(BaseParser):
         pending_ts_str: str = ""
         pending_timestamp = None
         pending_response_parts: list[str] = []
-        pending_turn_lines: list[dict[str, Any]] = []
+        # Raw JSONL lines of the current turn; they are already valid JSON, so the
+        # turn timeline is spliced together from them instead of re-serialized.
+        pending_turn_lines: list[bytes] = []
 
         def is_local_command_transcript(text: str) -> bool:
-            markers = (
-                "<local-command-caveat>",
-                "<command-name>",
-                "<command-message>",
-                "<command-args>",
-                "<local-command-stdout>",
-                "<local-command-stderr>",
-            )
-            return any(marker in text for marker in markers)
+            return _LOCAL_COMMAND_RE.search(text) is not None
 
         def extract_text(value: Any) -> Optional[str]:
             if isinstance(value, str):
@@ -132,7 +142,7 @@ class ClaudeCodeParser(BaseParser):
             timestamp = pending_timestamp
             response = "\n".join(pending_response_parts) if pending_response_parts else None
             turn_json = (
-                json.dumps(pending_turn_lines, ensure_ascii=False)
+                (b"[" + b",".join(pending_turn_lines) + b"]").decode("utf-8")
                 if pending_turn_lines
                 else None
             )
@@ -144,7 +154,7 @@ class ClaudeCodeParser(BaseParser):
             pending_response_parts = []
             pending_turn_lines = []
 
-            return ParsedPrompt(
+            prompt = ParsedPrompt(
                 id=prompt_id,
                 source=self.source_name,
                 content=content,
@@ -152,40 +162,51 @@ class ClaudeCodeParser(BaseParser):
                 session_id=session_id,
                 timestamp=timestamp,
                 response=response,
-                turn_json=turn_json,
             )
+            prompt.turn_json = turn_json
+            return prompt
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        data = json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
-                    if not isinstance(data, dict):
-                        continue
+            for _start, _end, line in _json.iter_jsonl_lines(file_path):
+                if _META_LINE_RE.search(line):
+                    # Meta events never start a prompt or carry assistant text, so they
+                    # are only decoded when a turn is open, to check they splice as JSON.
+                    if pending_content is not None:
+                        try:
+                            meta = _json.loads(line)
+                        except (_json.JSONDecodeError, UnicodeDecodeError):
+                            continue
+                        if isinstance(meta, dict):
+                            pending_turn_lines.append(line)
+                    continue
+                if pending_content is None and _LOCAL_COMMAND_RE_BYTES.search(line):
+                    # Nothing is open and command transcripts never become prompts.
+                    continue
+                try:
+                    data = _json.loads(line)
+                except (_json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if not isinstance(data, dict):
+                    continue
 
-                    user_text = is_user_prompt(data)
-                    if user_text is not None:
-                        flushed = flush_pending()
-                        if flushed is not None:
-                            yield flushed
-
-                        pending_content = user_text
-                        pending_ts_str = data.get("timestamp") or ""
-                        pending_timestamp = self.parse_timestamp(pending_ts_str)
-                        pending_response_parts = []
-                        pending_turn_lines = [data]
-                        continue
+                user_text = is_user_prompt(data)
+                if user_text is not None:
+                    flushed = flush_pending()
+                    if flushed is not None:
+                        yield flushed
+
+                    pending_content = user_text
+                    pending_ts_str = data.get("timestamp") or ""
+                    pending_timestamp = self.parse_timestamp(pending_ts_str)
+                    pending_response_parts = []
+                    pending_turn_lines = [line]
+                    continue
 
-                    if pending_content is None:
-                        continue
+                if pending_content is None:
+                    continue
 
-                    pending_turn_lines.append(data)
-                    pending_response_parts.extend(extract_assistant_text(data))
+                pending_turn_lines.append(line)
+                pending_response_parts.extend(extract_assistant_text(data))
         except OSError:
             return
 
@@ -1,10 +1,11 @@
 """Parser for Codex CLI (OpenAI Codex) logs."""
 
-import json
+import mmap
 import re
 from pathlib import Path
 from typing import Iterator, Optional
 
+from .. import _json
 from . import BaseParser, ParsedPrompt
 from ..codex_schema import (
     AgentMessageEvent,
@@ -19,6 +20,18 @@ from ..codex_schema import (
 _UUID_RE = re.compile(
     r"([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$"
 )
+_USER_EVENT_MARKER = b'"user_message"'
+
+
+def _file_contains(file_path: Path, needle: bytes) -> bool:
+    """Raw byte search over a file, without decoding it."""
+    with open(file_path, "rb") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm.find(needle) != -1
+        except ValueError:
+            # Empty files cannot be mapped.
+            return False
 
 
 class CodexParser(BaseParser):
@@ -129,7 +142,6 @@ class CodexParser(BaseParser):
                             session_id=session_id,
                             timestamp=timestamp,
                             response="\n".join(pending_response_parts) if pending_response_parts else None,
-                            turn_json=None,
                             origin_offset_start=pending_turn_start,
                             origin_offset_end=pending_turn_end,
                         )
@@ -185,20 +197,22 @@ class CodexParser(BaseParser):
                     session_id=session_id,
                     timestamp=timestamp,
                     response="\n".join(pending_response_parts) if pending_response_parts else None,
-                    turn_json=None,
                     origin_offset_start=pending_turn_start,
                     origin_offset_end=pending_turn_end,
                 )
 
-        yield from parse_jsonl(use_user_events=True)
+        # Older rollouts carry no `event_msg` user markers at all; a byte scan rules
+        # that out up front so those files are decoded once instead of twice.
+        if _file_contains(file_path, _USER_EVENT_MARKER):
+            yield from parse_jsonl(use_user_events=True)
         if not saw_user_events:
             yield from parse_jsonl(use_user_events=False)
 
     def _parse_json_rollout(self, file_path: Path) -> Iterator[ParsedPrompt]:
         """Parse legacy Codex rollouts stored as a single JSON document."""
         try:
-            data = json.loads(file_path.read_text(encoding="utf-8"))
-        except (OSError, UnicodeDecodeError, json.JSONDecodeError):
+            data = _json.loads(file_path.read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError, _json.JSONDecodeError):
             return
 
         if not isinstance(data, dict):
@@ -256,7 +270,7 @@ class CodexParser(BaseParser):
                 session_id=session_id,
                 timestamp=session_dt,
                 response="\n".join(response_parts) if response_parts else None,
-                turn_json=json.dumps(turn_items, ensure_ascii=False),
+                turn=turn_items,
             )
 
     def _extract_text_blocks(self, content, block_types: set[str]) -> Optional[str]:
@@ -283,7 +297,7 @@ class CodexParser(BaseParser):
         if not line:
             return None
         try:
-            obj = json.loads(line)
-        except json.JSONDecodeError:
+            obj = _json.loads(line)
+        except _json.JSONDecodeError:
             return None
         return obj if isinstance(obj, dict) else None
@@ -3,14 +3,28 @@
 import base64
 import sqlite3
 import binascii
-import json
 import os
+import re
 from pathlib import Path
 from typing import Iterator, Optional, List, Tuple, Set, Any, Dict
 from collections import Counter, defaultdict
 
+from .. import _json
 from . import BaseParser, ParsedPrompt
 
+# JSON documents start with an object/array after optional JSON whitespace; matching
+# this on the raw value avoids copying the blob just to strip it.
+_JSON_START_RE = re.compile(rb"[ \t\r\n]*[\[{]")
+
+# Per-connection tuning for one large sequential read: memory-map up to 256 MiB of
+# the file, give the page cache 64 MiB, and refuse writes outright.
+_READ_PRAGMAS = (
+    "PRAGMA query_only = 1",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA temp_store = MEMORY",
+)
+
 
 class CursorParser(BaseParser):
     """Parser for Cursor SQLite chat logs.
@@ -82,13 +96,28 @@ class CursorParser(BaseParser):
 
         yield from self._parse_legacy_store_db(file_path)
 
+    def _open_db(self, file_path: Path, *, timeout: float) -> sqlite3.Connection:
+        """Open a Cursor SQLite DB read-only.
+
+        `immutable=1` is deliberately not used: Cursor may be writing to the DB (and
+        its WAL) while we read, and immutable connections ignore both locks and WAL.
+        """
+        conn = sqlite3.connect(f"{file_path.absolute().as_uri()}?mode=ro", uri=True, timeout=timeout)
+        try:
+            for pragma in _READ_PRAGMAS:
+                conn.execute(pragma)
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
     def _parse_legacy_store_db(self, file_path: Path) -> Iterator[ParsedPrompt]:
         """Parse legacy Cursor chat DB at ~/.cursor/chats/**/store.db."""
         workspace_id = file_path.parent.parent.name
         chat_id = file_path.parent.name
 
         try:
-            conn = sqlite3.connect(f"file:{file_path}?mode=ro", uri=True, timeout=15.0)
+            conn = self._open_db(file_path, timeout=15.0)
         except sqlite3.Error:
             return
 
@@ -102,14 +131,13 @@ class CursorParser(BaseParser):
 
             if meta_row:
                 try:
-                    hex_value = meta_row[1]
-                    meta_json = binascii.unhexlify(hex_value).decode('utf-8')
-                    meta_data = json.loads(meta_json)
+                    meta_data = self._decode_legacy_meta(meta_row[1])
+                except (binascii.Error, _json.JSONDecodeError, ValueError, TypeError):
+                    meta_data = None
+                if meta_data:
                     chat_name = meta_data.get("name", "Unknown")
                     if "createdAt" in meta_data:
                         created_at = self.parse_timestamp(meta_data["createdAt"])
-                except (binascii.Error, json.JSONDecodeError, ValueError):
-                    pass
 
             messages: List[Tuple[str, str, str]] = []  # (role, content, blob_id)
             seen_content: Set[Tuple[str, str]] = set()  # (role, content_key)
@@ -190,7 +218,7 @@ class CursorParser(BaseParser):
                     session_id=chat_id,
                     timestamp=created_at,
                     response=response,
-                    turn_json=json.dumps(turn_messages, ensure_ascii=False),
+                    turn=turn_messages,
                 )
 
                 i += 1
@@ -198,6 +226,16 @@ class CursorParser(BaseParser):
         finally:
             conn.close()
 
+    def _decode_legacy_meta(self, value: Any) -> Optional[Dict[str, Any]]:
+        """Decode a legacy `meta` value: hex-encoded JSON, or JSON stored as-is."""
+        raw = value.encode("utf-8") if isinstance(value, str) else bytes(value)
+        # Hex digits never start a JSON object, so only hex payloads need unhexlify;
+        # either way the UTF-8 bytes go to the JSON decoder without a str round trip.
+        if not _JSON_START_RE.match(raw):
+            raw = binascii.unhexlify(raw)
+        data = _json.loads(raw)
+        return data if isinstance(data, dict) else None
+
     def _iter_legacy_blobs(self, conn: sqlite3.Connection) -> Iterator[Tuple[str, bytes]]:
         """Yield blobs in stable insertion order."""
         try:
@@ -230,7 +268,7 @@ class CursorParser(BaseParser):
         try:
             # Cursor writes to this DB frequently; allow a longer busy timeout so rebuild doesn't
             # fail when the editor briefly holds a write lock.
-            conn = sqlite3.connect(f"file:{file_path}?mode=ro", uri=True, timeout=60.0)
+            conn = self._open_db(file_path, timeout=60.0)
         except sqlite3.Error:
             return
 
@@ -247,7 +285,7 @@ class CursorParser(BaseParser):
 
             composer_meta: Dict[str, Dict[str, Any]] = {}
             for key, value in conn.execute(
-                "SELECT key, value FROM cursorDiskKV WHERE key LIKE 'composerData:%'"
+                "SELECT key, value FROM cursorDiskKV WHERE key GLOB 'composerData:*'"
             ):
                 composer_id = self._parse_composer_id(key)
                 if not composer_id:
@@ -274,7 +312,7 @@ class CursorParser(BaseParser):
                 )
 
             for key, value in conn.execute(
-                "SELECT key, value FROM cursorDiskKV WHERE key LIKE 'bubbleId:%' ORDER BY key"
+                "SELECT key, value FROM cursorDiskKV WHERE key GLOB 'bubbleId:*' ORDER BY key"
             ):
                 composer_id, bubble_id = self._parse_bubble_key(key)
                 if not composer_id or not bubble_id:
@@ -393,9 +431,9 @@ class CursorParser(BaseParser):
         if value is None:
             return None
 
-        if isinstance(value, memoryview):
-            raw = value.tobytes()
-        elif isinstance(value, (bytes, bytearray)):
+        if isinstance(value, bytes):
+            raw = value
+        elif isinstance(value, (bytearray, memoryview)):
             raw = bytes(value)
         elif isinstance(value, str):
             raw = value.encode("utf-8", errors="ignore")
@@ -405,36 +443,17 @@ class CursorParser(BaseParser):
             except Exception:
                 return None
 
-        # Fast path: UTF-8 JSON
-        try:
-            text = raw.decode("utf-8")
-        except UnicodeDecodeError:
-            text = None
-
-        if text is not None:
-            stripped = text.lstrip()
-            if stripped.startswith("{") or stripped.startswith("["):
-                try:
-                    return json.loads(text)
-                except json.JSONDecodeError:
-                    pass
-            # base64 JSON stored as text
+        # Fast path: UTF-8 JSON, decoded straight from the stored bytes.
+        if _JSON_START_RE.match(raw):
             try:
-                decoded = base64.b64decode(text, validate=True)
-                try:
-                    return json.loads(decoded.decode("utf-8"))
-                except Exception:
-                    pass
-            except Exception:
+                return _json.loads(raw)
+            except (_json.JSONDecodeError, UnicodeDecodeError):
                 pass
 
-        # base64 JSON stored as bytes
+        # base64 JSON (stored as text or bytes)
         try:
             decoded = base64.b64decode(raw, validate=True)
-            try:
-                return json.loads(decoded.decode("utf-8"))
-            except Exception:
-                return None
+            return _json.loads(decoded)
         except Exception:
             return None
 
@@ -527,7 +546,7 @@ class CursorParser(BaseParser):
     def _try_parse_json(self, blob_data: bytes) -> Optional[Tuple[str, str]]:
         """Try to parse blob as JSON."""
         try:
-            data = json.loads(blob_data.decode('utf-8'))
+            data = _json.loads(blob_data.decode('utf-8'))
             if not isinstance(data, dict):
                 return None
 
@@ -547,7 +566,7 @@ class CursorParser(BaseParser):
             elif role == "tool":
                 return ("tool", "")  # Mark as tool but no content needed
 
-        except (UnicodeDecodeError, json.JSONDecodeError):
+        except (UnicodeDecodeError, _json.JSONDecodeError):
             pass
         return None
 
@@ -562,8 +581,8 @@ class CursorParser(BaseParser):
             if not candidate.startswith("{"):
                 continue
             try:
-                embedded = json.loads(candidate)
-            except json.JSONDecodeError:
+                embedded = _json.loads(candidate)
+            except _json.JSONDecodeError:
                 continue
             if not isinstance(embedded, dict):
                 continue
@@ -588,26 +607,39 @@ class CursorParser(BaseParser):
 
     def _parse_protobuf_strings(self, data: bytes) -> List[Tuple[int, str]]:
         """Extract strings from Protobuf-encoded data."""
-        strings = []
+        strings: List[Tuple[int, str]] = []
         pos = 0
+        size = len(data)
+        decode_varint = self._decode_varint
 
-        while pos < len(data):
+        while pos < size:
             try:
-                tag_byte, pos = self._decode_varint(data, pos)
-                if tag_byte is None:
-                    break
-
-                field_num = tag_byte >> 3
-                wire_type = tag_byte & 0x7
+                # Tags and lengths are nearly always single-byte varints; only take the
+                # general decoder when the continuation bit is set.
+                tag = data[pos]
+                if tag < 0x80:
+                    pos += 1
+                else:
+                    tag, pos = decode_varint(data, pos)
+                    if tag is None:
+                        break
 
-                if wire_type == 0:  # Varint
-                    _, pos = self._decode_varint(data, pos)
-                elif wire_type == 2:  # Length-delimited
-                    length, pos = self._decode_varint(data, pos)
-                    if length is None or pos + length > len(data):
+                field_num = tag >> 3
+                wire_type = tag & 0x7
+
+                if wire_type == 2:  # Length-delimited
+                    if pos < size and data[pos] < 0x80:
+                        length = data[pos]
+                        pos += 1
+                    else:
+                        length, pos = decode_varint(data, pos)
+                        if length is None:
+                            break
+                    end = pos + length
+                    if end > size:
                         break
-                    chunk = data[pos:pos + length]
-                    pos += length
+                    chunk = data[pos:end]
+                    pos = end
 
                     # Try to decode as UTF-8 string
                     try:
@@ -616,8 +648,9 @@ class CursorParser(BaseParser):
                             strings.append((field_num, s))
                     except UnicodeDecodeError:
                         # Try recursive parse for nested messages
-                        nested = self._parse_protobuf_strings(chunk)
-                        strings.extend(nested)
+                        strings.extend(self._parse_protobuf_strings(chunk))
+                elif wire_type == 0:  # Varint
+                    _, pos = decode_varint(data, pos)
                 elif wire_type == 5:  # 32-bit
                     pos += 4
                 elif wire_type == 1:  # 64-bit
@@ -1,9 +1,9 @@
 """Parser for Gemini CLI session logs."""
 
-import json
 from pathlib import Path
 from typing import Iterator, Optional
 
+from .. import _json
 from . import BaseParser, ParsedPrompt
 
 
@@ -45,7 +45,7 @@ class GeminiCliParser(BaseParser):
 
     def parse_file(self, file_path: Path) -> Iterator[ParsedPrompt]:
         try:
-            data = json.loads(file_path.read_text("utf-8"))
+            data = _json.loads(file_path.read_text("utf-8"))
         except Exception:
             return
 
@@ -61,41 +61,31 @@ class GeminiCliParser(BaseParser):
         if not isinstance(messages, list):
             return
 
-        i = 0
-        while i < len(messages):
-            msg = messages[i]
-            if not isinstance(msg, dict):
-                i += 1
-                continue
-
-            if msg.get("type") != "user":
-                i += 1
-                continue
+        # Every "user" message closes the previous turn (even ones too short to be a
+        # prompt), so the turn boundaries are simply the user message indices.
+        user_indices = [
+            idx for idx, msg in enumerate(messages) if isinstance(msg, dict) and msg.get("type") == "user"
+        ]
+        boundaries = user_indices[1:] + [len(messages)]
 
+        for i, j in zip(user_indices, boundaries):
+            msg = messages[i]
             content = msg.get("content") or ""
             if not isinstance(content, str) or len(content.strip()) < 10:
-                i += 1
                 continue
 
             ts_str = msg.get("timestamp") or ""
             timestamp = self.parse_timestamp(ts_str)
 
             response_parts: list[str] = []
-            j = i + 1
-            while j < len(messages):
-                next_msg = messages[j]
+            for next_msg in messages[i + 1 : j]:
                 if not isinstance(next_msg, dict):
-                    j += 1
                     continue
-                if next_msg.get("type") == "user":
-                    break
                 next_content = next_msg.get("content") or ""
                 if isinstance(next_content, str) and next_content.strip():
                     response_parts.append(next_content)
-                j += 1
 
             response = "\n".join(response_parts) if response_parts else None
-            turn_json = json.dumps(messages[i:j], ensure_ascii=False)
 
             unique = msg.get("id") or ts_str
             prompt_id = self.generate_id(
@@ -113,7 +103,5 @@ class GeminiCliParser(BaseParser):
                 session_id=session_id,
                 timestamp=timestamp,
                 response=response,
-                turn_json=turn_json,
+                turn=messages[i:j],
             )
-
-            i += 1
@@ -4,13 +4,18 @@ from __future__ import annotations
 
 import duckdb
 from pathlib import Path
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
 import logging
+import multiprocessing
+import os
 import time
 import errno
-from typing import Callable, Optional, TYPE_CHECKING
+from typing import Callable, Iterable, Iterator, Optional, TYPE_CHECKING
 
-from .db import get_connection, insert_prompt, pack_large_text
+from .db import get_connection, insert_prompts_bulk_ids, pack_large_text, refresh_fts_index
 from .parsers.claude_code import ClaudeCodeParser
 from .parsers.cursor import CursorParser
 from .parsers.aider import AiderParser
@@ -19,7 +24,7 @@ from .parsers.gemini_cli import GeminiCliParser
 from .parsers.amp import AmpParser
 
 if TYPE_CHECKING:
-    from .parsers import BaseParser
+    from .parsers import BaseParser, ParsedPrompt
 
 
 @dataclass(frozen=True)
@@ -42,6 +47,83 @@ class SyncProgress:
 ProgressCallback = Callable[[SyncProgress], None]
 
 
+def _sync_workers() -> int:
+    """Number of processes that parse log files during sync (1 = parse in-process).
+
+    Opt-in via `PROMPT_MANAGER_SYNC_WORKERS` (an integer, or `auto` for one per CPU).
+    """
+    value = os.environ.get("PROMPT_MANAGER_SYNC_WORKERS", "1").strip().lower()
+    if value == "auto":
+        return os.cpu_count() or 1
+    try:
+        return max(1, int(value))
+    except ValueError:
+        return 1
+
+
+def _parse_file_job(parser: BaseParser, file_path: Path) -> list[ParsedPrompt]:
+    """Parse one file in a worker process; the prompts are pickled back to the parent."""
+    prompts = list(parser.parse_file(file_path))
+    for prompt in prompts:
+        # Serialize here, in parallel, and pickle one string rather than the timeline.
+        prompt.drop_turn()
+    return prompts
+
+
+def _iter_parsed(future: Future, parser: BaseParser, file_path: Path) -> Iterator[ParsedPrompt]:
+    # Defers `result()` so worker exceptions surface inside `_sync_file`'s error handling.
+    try:
+        prompts = future.result()
+    except BrokenProcessPool:
+        # A worker died (or could not start); parse this file in-process instead.
+        prompts = parser.parse_file(file_path)
+    yield from prompts
+
+
+class _ParsePrefetcher:
+    """Parse upcoming files in worker processes while the parent writes to DuckDB.
+
+    Only `parse_file` runs in the workers; every DuckDB write stays in the calling
+    process. At most two files per worker are parsed ahead to bound memory.
+    """
+
+    def __init__(self, file_jobs: list[tuple[BaseParser, Path]], job_indices: Iterable[int], workers: int):
+        self._file_jobs = file_jobs
+        self._queue = deque(job_indices)
+        self._window = workers * 2
+        self._futures: dict[int, Future] = {}
+        # `spawn` avoids forking a process that holds a DuckDB connection and, in the
+        # TUI, other running threads.
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def _fill(self) -> None:
+        while self._queue and len(self._futures) < self._window:
+            idx = self._queue[0]
+            parser, file_path = self._file_jobs[idx]
+            try:
+                self._futures[idx] = self._pool.submit(_parse_file_job, parser, file_path)
+            except BrokenProcessPool:
+                # Remaining files are parsed in-process by the caller.
+                self._queue.clear()
+                return
+            self._queue.popleft()
+
+    def take(self, idx: int) -> Optional[Iterator[ParsedPrompt]]:
+        """Return the prompts of job `idx`, or None if the caller should parse it."""
+        self._fill()
+        future = self._futures.pop(idx, None)
+        self._fill()
+        if future is None:
+            return None
+        parser, file_path = self._file_jobs[idx]
+        return _iter_parsed(future, parser, file_path)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
 def _init_file_state_table(conn: duckdb.DuckDBPyConnection) -> None:
     """Create file state tracking table."""
     conn.execute("""
@@ -82,30 +164,59 @@ def _get_file_state(conn: duckdb.DuckDBPyConnection, file_path: str) -> Optional
     return None
 
 
-def _update_file_state(
-    conn: duckdb.DuckDBPyConnection,
-    file_path: str,
-    source: str,
-    file_size: int,
-    mtime: float,
-    sync_version: int,
-) -> None:
-    """Update the stored state for a file."""
+def _load_file_states(conn: duckdb.DuckDBPyConnection) -> dict[str, dict]:
+    """Get the stored state of every file in one query, keyed by file path."""
+    rows = conn.execute("""
+        SELECT file_path, file_size, mtime, sync_version, last_sync
+        FROM file_sync_state
+    """).fetchall()
+    return {
+        row[0]: {"file_size": row[1], "mtime": row[2], "sync_version": row[3], "last_sync": row[4]}
+        for row in rows
+    }
+
+
+# (file_path, source, file_size, mtime, sync_version)
+FileStateRow = tuple[str, str, int, float, int]
+
+# Synced files whose state rows are written together by `sync_all`.
+_FILE_STATE_BATCH = 256
+
+
+def _update_file_states(conn: duckdb.DuckDBPyConnection, rows: list[FileStateRow]) -> None:
+    """Upsert the stored state of many files with a single statement."""
+    if not rows:
+        return
+    # A row may only be upserted once per statement; the last state of a path wins.
+    unique_rows = {row[0]: row for row in rows}.values()
+    file_paths, sources, file_sizes, mtimes, sync_versions = (list(col) for col in zip(*unique_rows))
     conn.execute("""
         INSERT INTO file_sync_state (file_path, source, file_size, mtime, sync_version, last_sync)
-        VALUES (?, ?, ?, ?, ?, NOW())
+        SELECT
+            UNNEST(?::VARCHAR[]),
+            UNNEST(?::VARCHAR[]),
+            UNNEST(?::BIGINT[]),
+            UNNEST(?::DOUBLE[]),
+            UNNEST(?::INTEGER[]),
+            NOW()
         ON CONFLICT (file_path) DO UPDATE SET
             file_size = EXCLUDED.file_size,
             mtime = EXCLUDED.mtime,
             sync_version = EXCLUDED.sync_version,
             last_sync = NOW()
-    """, [file_path, source, file_size, mtime, sync_version])
+    """, [file_paths, sources, file_sizes, mtimes, sync_versions])
 
 
 def _file_sync_status(
-    conn: duckdb.DuckDBPyConnection, parser: BaseParser, file_path: Path
+    conn: duckdb.DuckDBPyConnection,
+    parser: BaseParser,
+    file_path: Path,
+    states: Optional[dict[str, dict]] = None,
 ) -> tuple[bool, Optional[str]]:
-    """Return (needs_sync, reason) for a file."""
+    """Return (needs_sync, reason) for a file.
+
+    `states` (from `_load_file_states`) avoids a lookup query per file.
+    """
     try:
         stat = file_path.stat()
         current_size = stat.st_size
@@ -115,7 +226,10 @@ def _file_sync_status(
             return False, "missing"
         return False, "unreadable"
 
-    state = _get_file_state(conn, str(file_path))
+    if states is None:
+        state = _get_file_state(conn, str(file_path))
+    else:
+        state = states.get(str(file_path))
     if state is None:
         return True, "new"
 
@@ -130,38 +244,69 @@ def _file_sync_status(
     return False, "up-to-date"
 
 
-def _file_needs_sync(conn: duckdb.DuckDBPyConnection, parser: BaseParser, file_path: Path) -> bool:
-    needs_sync, _ = _file_sync_status(conn, parser, file_path)
+def _file_needs_sync(
+    conn: duckdb.DuckDBPyConnection,
+    parser: BaseParser,
+    file_path: Path,
+    states: Optional[dict[str, dict]] = None,
+) -> bool:
+    needs_sync, _ = _file_sync_status(conn, parser, file_path, states)
     return needs_sync
 
 
+# (id, response, response_blob, turn_json, turn_json_blob, origin_path,
+#  origin_offset_start, origin_offset_end)
+_BackfillRow = tuple[
+    str,
+    Optional[str],
+    Optional[bytes],
+    Optional[str],
+    Optional[bytes],
+    Optional[str],
+    Optional[int],
+    Optional[int],
+]
+
+
+def _merge_backfill_rows(earlier: _BackfillRow, later: _BackfillRow) -> _BackfillRow:
+    """Combine two backfills of one id as if applied in order: earlier values win."""
+    response = earlier[1:3] if (earlier[1] or earlier[2]) else later[1:3]
+    turn = earlier[3:5] if (earlier[3] or earlier[4]) else later[3:5]
+    return (
+        earlier[0],
+        *response,
+        *turn,
+        earlier[5] or later[5],
+        earlier[6] if earlier[6] is not None else later[6],
+        earlier[7] if earlier[7] is not None else later[7],
+    )
+
+
 def _sync_file(
     conn: duckdb.DuckDBPyConnection,
     parser: BaseParser,
     file_path: Path,
     *,
     progress: Optional[Callable[[int, int], None]] = None,
+    prompts: Optional[Iterable[ParsedPrompt]] = None,
+    file_states: Optional[list[FileStateRow]] = None,
 ) -> tuple[int, Optional[str]]:
     """Sync a single file and return (prompts_inserted, error_message).
 
+    `prompts` can supply already-parsed prompts (e.g. from a worker process) in
+    place of calling `parser.parse_file`. With `file_states`, the file's new state
+    is appended there once its prompts are committed, for the caller to write in
+    bulk with `_update_file_states`.
+
     Returns:
         (number of new prompts inserted, None) on success, or (-1, message) on error.
     """
     count = 0
     items_done = 0
     last_emit = 0.0
-    backfill_rows: list[
-        tuple[
-            str,
-            Optional[str],
-            Optional[bytes],
-            Optional[str],
-            Optional[bytes],
-            Optional[str],
-            Optional[int],
-            Optional[int],
-        ]
-    ] = []
+    # Keyed by prompt id: one UPDATE ... FROM row per id, since DuckDB would pick an
+    # arbitrary source row when several match.
+    backfill_rows: dict[str, _BackfillRow] = {}
     backfill_batch_size = 250
 
     try:
@@ -186,7 +331,7 @@ def _sync_file(
         conn.execute(
             "CREATE TEMP TABLE tmp_backfill(id VARCHAR, response TEXT, response_blob BLOB, turn_json TEXT, turn_json_blob BLOB, origin_path VARCHAR, origin_offset_start BIGINT, origin_offset_end BIGINT)"
         )
-        conn.executemany("INSERT INTO tmp_backfill VALUES (?,?,?,?,?,?,?,?)", backfill_rows)
+        conn.executemany("INSERT INTO tmp_backfill VALUES (?,?,?,?,?,?,?,?)", list(backfill_rows.values()))
         conn.execute(
             """
             UPDATE prompts
@@ -210,14 +355,101 @@ def _sync_file(
             """
         )
         conn.execute("DROP TABLE tmp_backfill")
-        backfill_rows = []
+        backfill_rows = {}
+
+    pending_prompts: list[ParsedPrompt] = []
+
+    def flush_pending_prompts() -> None:
+        nonlocal pending_prompts, count
+        if not pending_prompts:
+            return
+        origin_path = str(file_path)
+        inserted_ids = insert_prompts_bulk_ids(
+            conn,
+            [
+                {
+                    "id": prompt.id,
+                    "source": prompt.source,
+                    "content": prompt.content,
+                    "project_path": prompt.project_path,
+                    "session_id": prompt.session_id,
+                    "origin_path": origin_path,
+                    "origin_offset_start": prompt.origin_offset_start,
+                    "origin_offset_end": prompt.origin_offset_end,
+                    "timestamp": prompt.timestamp,
+                    "response": prompt.response,
+                    "turn_json": prompt.turn_json,
+                }
+                for prompt in pending_prompts
+            ],
+        )
+        count += len(inserted_ids)
+
+        # Only the first copy of a repeated id is inserted; later copies (like ids
+        # already stored) may still fill in fields the inserted row lacks.
+        existing = []
+        seen_ids: set[str] = set()
+        for prompt in pending_prompts:
+            repeated = prompt.id in seen_ids
+            seen_ids.add(prompt.id)
+            if (repeated or prompt.id not in inserted_ids) and (prompt.response or prompt.turn_json):
+                existing.append(prompt)
+        pending_prompts = []
+        if not existing:
+            return
+
+        # Backfill missing large fields in a single set-based UPDATE (fast),
+        # instead of per-prompt UPDATEs (can be very slow in DuckDB).
+        missing_by_id = {
+            row[0]: row[1:]
+            for row in conn.execute(
+                """
+                SELECT
+                    id,
+                    (response IS NULL AND response_blob IS NULL) AS response_missing,
+                    (turn_json IS NULL AND turn_json_blob IS NULL) AS turn_missing,
+                    origin_path IS NULL AS origin_missing,
+                    origin_offset_start IS NULL AS offset_start_missing,
+                    origin_offset_end IS NULL AS offset_end_missing
+                FROM prompts
+                WHERE id IN (SELECT UNNEST(?::VARCHAR[]))
+                """,
+                [[prompt.id for prompt in existing]],
+            ).fetchall()
+        }
+        for prompt in existing:
+            needs_backfill = missing_by_id.get(prompt.id)
+            if not needs_backfill or not any(needs_backfill):
+                continue
+            inline_response, response_blob = pack_large_text(prompt.response, keep_preview=True)
+            inline_turn_json, turn_blob = pack_large_text(prompt.turn_json, keep_preview=False)
+            needs_response = bool(needs_backfill[0] and (inline_response or response_blob))
+            needs_turn_json = bool(needs_backfill[1] and (inline_turn_json or turn_blob))
+            needs_origin = bool(needs_backfill[2])
+            needs_offset_start = bool(needs_backfill[3] and prompt.origin_offset_start is not None)
+            needs_offset_end = bool(needs_backfill[4] and prompt.origin_offset_end is not None)
+            if needs_response or needs_turn_json or needs_origin or needs_offset_start or needs_offset_end:
+                row: _BackfillRow = (
+                    prompt.id,
+                    inline_response,
+                    response_blob,
+                    inline_turn_json,
+                    turn_blob,
+                    origin_path,
+                    prompt.origin_offset_start,
+                    prompt.origin_offset_end,
+                )
+                earlier = backfill_rows.get(prompt.id)
+                backfill_rows[prompt.id] = row if earlier is None else _merge_backfill_rows(earlier, row)
+            if len(backfill_rows) >= backfill_batch_size:
+                flush_backfill_rows()
 
     try:
         # DuckDB autocommits each statement by default, which becomes extremely slow
         # when syncing large sessions (hundreds/thousands of prompts). Wrap a file
         # sync in a single transaction so we pay fsync/commit cost once per file.
         conn.execute("BEGIN")
-        for prompt in parser.parse_file(file_path):
+        for prompt in parser.parse_file(file_path) if prompts is None else prompts:
             items_done += 1
             batch_rows += 1
 
@@ -226,66 +458,15 @@ def _sync_file(
                 approx += len(prompt.response)
             if prompt.turn_json:
                 approx += len(prompt.turn_json)
+            # Only the serialized timeline is stored; don't keep the parsed one alive.
+            prompt.drop_turn()
             batch_bytes += approx
 
-            inserted = insert_prompt(
-                conn,
-                id=prompt.id,
-                source=prompt.source,
-                content=prompt.content,
-                project_path=prompt.project_path,
-                session_id=prompt.session_id,
-                origin_path=str(file_path),
-                origin_offset_start=prompt.origin_offset_start,
-                origin_offset_end=prompt.origin_offset_end,
-                timestamp=prompt.timestamp,
-                response=prompt.response,
-                turn_json=prompt.turn_json,
-                backfill_missing_fields=False,
-            )
-            if inserted:
-                count += 1
-            elif prompt.response or prompt.turn_json:
-                # Backfill missing large fields in a single set-based UPDATE (fast),
-                # instead of per-prompt UPDATEs (can be very slow in DuckDB).
-                needs_backfill = conn.execute(
-                    """
-                    SELECT
-                        (response IS NULL AND response_blob IS NULL) AS response_missing,
-                        (turn_json IS NULL AND turn_json_blob IS NULL) AS turn_missing,
-                        origin_path IS NULL AS origin_missing,
-                        origin_offset_start IS NULL AS offset_start_missing,
-                        origin_offset_end IS NULL AS offset_end_missing
-                    FROM prompts
-                    WHERE id = ?
-                    """,
-                    [prompt.id],
-                ).fetchone()
-                inline_response, response_blob = pack_large_text(prompt.response, keep_preview=True)
-                inline_turn_json, turn_blob = pack_large_text(prompt.turn_json, keep_preview=False)
-                needs_response = bool(needs_backfill and needs_backfill[0] and (inline_response or response_blob))
-                needs_turn_json = bool(needs_backfill and needs_backfill[1] and (inline_turn_json or turn_blob))
-                needs_origin = bool(needs_backfill and needs_backfill[2])
-                needs_offset_start = bool(needs_backfill and needs_backfill[3] and prompt.origin_offset_start is not None)
-                needs_offset_end = bool(needs_backfill and needs_backfill[4] and prompt.origin_offset_end is not None)
-                if needs_response or needs_turn_json or needs_origin or needs_offset_start or needs_offset_end:
-                    backfill_rows.append(
-                        (
-                            prompt.id,
-                            inline_response,
-                            response_blob,
-                            inline_turn_json,
-                            turn_blob,
-                            str(file_path),
-                            prompt.origin_offset_start,
-                            prompt.origin_offset_end,
-                        )
-                    )
-
-            if len(backfill_rows) >= backfill_batch_size:
-                flush_backfill_rows()
+            # Prompts are staged and inserted set-based once per commit batch.
+            pending_prompts.append(prompt)
 
             if batch_rows >= batch_row_limit or batch_bytes >= batch_byte_limit:
+                flush_pending_prompts()
                 flush_backfill_rows()
                 conn.execute("COMMIT")
                 conn.execute("BEGIN")
@@ -295,22 +476,30 @@ def _sync_file(
             if progress:
                 now = time.monotonic()
                 if items_done == 1 or (now - last_emit) > 0.2:
+                    # Insert what is staged so the reported count is current.
+                    flush_pending_prompts()
                     progress(items_done, count)
                     last_emit = now
 
+        flush_pending_prompts()
         flush_backfill_rows()
 
         # Update file state after successful parse
         stat = file_path.stat()
-        _update_file_state(
-            conn,
+        state_row: FileStateRow = (
             str(file_path),
             parser.source_name,
             stat.st_size,
             stat.st_mtime,
             int(getattr(parser, "sync_version", 1) or 1),
         )
+        if file_states is None:
+            _update_file_states(conn, [state_row])
         conn.execute("COMMIT")
+        if file_states is not None:
+            # Deferred past the commit: a state lost to a crash only means the file
+            # is parsed again next time, and its prompts are skipped as duplicates.
+            file_states.append(state_row)
         if parser.source_name == "codex" or file_size >= 20 * 1024 * 1024:
             try:
                 conn.execute("CHECKPOINT")
@@ -387,6 +576,50 @@ def sync_all(
         for file_path in parser.find_log_files():
             file_jobs.append((parser, file_path))
 
+    # Decide up front which files need syncing so that, with parse workers enabled,
+    # upcoming files can be parsed while earlier ones are written.
+    states = _load_file_states(conn)
+    job_statuses: list[tuple[bool, Optional[str]]] = []
+    for parser, file_path in file_jobs:
+        needs_sync, reason = _file_sync_status(conn, parser, file_path, states)
+        if force and reason not in {"missing", "unreadable"} and not needs_sync:
+            needs_sync, reason = True, "forced"
+        job_statuses.append((needs_sync, reason))
+
+    workers = _sync_workers()
+    prefetcher: Optional[_ParsePrefetcher] = None
+    if workers > 1:
+        prefetcher = _ParsePrefetcher(
+            file_jobs,
+            [job_idx for job_idx, (needs_sync, _) in enumerate(job_statuses) if needs_sync],
+            workers,
+        )
+
+    file_states: list[FileStateRow] = []
+    try:
+        _sync_file_jobs(
+            conn, file_jobs, job_statuses, counts, progress_callback, prefetcher, file_states
+        )
+    finally:
+        if prefetcher is not None:
+            prefetcher.close()
+        _update_file_states(conn, file_states)
+
+    if counts["files_updated"]:
+        refresh_fts_index(conn)
+
+    return counts
+
+
+def _sync_file_jobs(
+    conn: duckdb.DuckDBPyConnection,
+    file_jobs: list[tuple[BaseParser, Path]],
+    job_statuses: list[tuple[bool, Optional[str]]],
+    counts: dict,
+    progress_callback: Optional[ProgressCallback],
+    prefetcher: Optional[_ParsePrefetcher],
+    file_states: list[FileStateRow],
+) -> None:
     files_total = len(file_jobs)
     if progress_callback:
         progress_callback(
@@ -404,10 +637,7 @@ def sync_all(
 
     for idx, (parser, file_path) in enumerate(file_jobs, 1):
         counts["files_checked"] = idx
-
-        needs_sync, reason = _file_sync_status(conn, parser, file_path)
-        if force and reason not in {"missing", "unreadable"} and not needs_sync:
-            needs_sync, reason = True, "forced"
+        needs_sync, reason = job_statuses[idx - 1]
 
         if progress_callback:
             progress_callback(
@@ -483,7 +713,17 @@ def sync_all(
                     )
                 )
 
-            result = _sync_file(conn, parser, file_path, progress=emit_file_progress)
+            result = _sync_file(
+                conn,
+                parser,
+                file_path,
+                progress=emit_file_progress,
+                prompts=prefetcher.take(idx - 1) if prefetcher is not None else None,
+                file_states=file_states,
+            )
+            if len(file_states) >= _FILE_STATE_BATCH:
+                _update_file_states(conn, file_states)
+                file_states.clear()
             inserted_count, sync_error = result
             if inserted_count >= 0:
                 inserted_in_file = inserted_count
@@ -513,8 +753,6 @@ def sync_all(
                 )
             )
 
-    return counts
-
 
 def rebuild_database(
     conn: Optional[duckdb.DuckDBPyConnection] = None,
@@ -694,9 +932,10 @@ def check_updates(conn: Optional[duckdb.DuckDBPyConnection] = None) -> dict:
         AmpParser(),
     ]
 
+    states = _load_file_states(conn)
     for parser in parsers:
         for file_path in parser.find_log_files():
-            if _file_needs_sync(conn, parser, file_path):
+            if _file_needs_sync(conn, parser, file_path, states):
                 updates[parser.source_name] += 1
 
     return updates
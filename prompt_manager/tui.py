@@ -9,7 +9,7 @@ from textual.widgets import (
 from textual.widgets.tree import TreeNode
 from textual.widgets.option_list import Option
 from textual.binding import Binding
-from textual import on
+from textual import on, work
 from textual.screen import ModalScreen
 from textual.timer import Timer
 try:
@@ -20,11 +20,16 @@ except Exception:  # pragma: no cover
 from datetime import datetime
 from typing import Optional
 from collections import defaultdict
+import asyncio
+import duckdb
 import platform
+import re
 import pyperclip
 from rich.markup import escape as escape_markup
+from rich.text import Text
 import shlex
 import shutil
+import string
 import subprocess
 import os
 import threading
@@ -42,6 +47,37 @@ from .db import (
 from .codex_transcript import format_codex_turn_json
 from .sync import SyncProgress, rebuild_database, sync_all
 
+# AppleScript launchers for macOS; only the shell command varies per fork.
+_ITERM_TEMPLATE = string.Template(
+    'tell application "iTerm"\n'
+    "    activate\n"
+    "    create window with default profile\n"
+    "    tell current session of current window\n"
+    '        write text "$cmd"\n'
+    "    end tell\n"
+    "end tell"
+)
+_TERMINAL_TEMPLATE = string.Template(
+    'tell application "Terminal"\n'
+    "    activate\n"
+    '    do script "$cmd"\n'
+    "end tell"
+)
+_APPLESCRIPT_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"'})
+
+# Terminals that accept argv directly; "{cwd}" is replaced with the work dir.
+_DIRECT_TERMINALS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("wezterm", ("wezterm", "start", "--cwd", "{cwd}", "--")),
+    ("kitty", ("kitty", "--directory", "{cwd}")),
+    ("alacritty", ("alacritty", "--working-directory", "{cwd}", "-e")),
+)
+
+# Delay before a search scan runs while the user is still typing.
+_SEARCH_DEBOUNCE_SECONDS = 0.2
+
+# Project-level common prefix detection for tree labels.
+_COMMON_PREFIX_MIN_CHARS = 30
+
 
 class ForkConfirmScreen(ModalScreen):
     """Confirmation dialog for forking a session."""
@@ -778,7 +814,7 @@ class PromptManagerApp(App):
         self.prompts: list[dict] = []
         self.prompt_map: dict[str, dict] = {}  # id -> prompt
         self.selected_prompt: Optional[dict] = None
-        self._search_timer: Optional[Timer] = None
+        self._preview_prompt_id: Optional[str] = None
 
     def compose(self) -> ComposeResult:
         yield Header()
@@ -851,25 +887,41 @@ class PromptManagerApp(App):
 
     def load_prompts(self) -> None:
         """Load prompts and build tree by session."""
-        query = (self.search_query or "").strip() or None
-
-        if self.current_filter is None and not self.starred_only and query is None:
+        prompts = self._fetch_prompts(
+            self.conn, self.search_query, self.current_filter, self.starred_only
+        )
+        self._apply_loaded_prompts(prompts)
+
+    @staticmethod
+    def _fetch_prompts(
+        conn,
+        search_query: str,
+        source: Optional[str],
+        starred_only: bool,
+    ) -> list[dict]:
+        """Run the list query for the given filter state (safe to call off the UI thread)."""
+        query = (search_query or "").strip() or None
+
+        if source is None and not starred_only and query is None:
             sources = ["claude_code", "cursor", "aider", "amp", "codex", "gemini_cli"]
             per_source = max(50, 1000 // max(len(sources), 1))
-            self.prompts = search_prompt_summaries_balanced(
-                self.conn,
+            return search_prompt_summaries_balanced(
+                conn,
                 sources=sources,
                 per_source_limit=per_source,
                 snippet_len=400,
             )
-        else:
-            self.prompts = search_prompt_summaries(
-                self.conn,
-                query=query,
-                source=self.current_filter,
-                starred_only=self.starred_only,
-                limit=1000,
-            )
+        return search_prompt_summaries(
+            conn,
+            query=query,
+            source=source,
+            starred_only=starred_only,
+            limit=1000,
+        )
+
+    def _apply_loaded_prompts(self, prompts: list[dict]) -> None:
+        """Replace the loaded prompt list and rebuild the session tree."""
+        self.prompts = prompts
 
         # Build prompt map
         self.prompt_map = {p["id"]: p for p in self.prompts}
@@ -929,6 +981,11 @@ class PromptManagerApp(App):
 
                 # Detect common prefix across entire project
                 project_common_prefix = self._find_common_prefix(all_project_prompts)
+                project_prefix_re = (
+                    re.compile(re.escape(project_common_prefix) + r"\s*(.{0,35})", re.DOTALL)
+                    if project_common_prefix
+                    else None
+                )
 
                 for session in sorted(grouped[source][project].keys(), reverse=True):
                     prompts_in_session = grouped[source][project][session]
@@ -953,7 +1010,9 @@ class PromptManagerApp(App):
                         time_str = ts.strftime("%H:%M") if ts else ""
 
                         # Generate smart label using project-level common prefix
-                        label = self._make_smart_label(content, project_common_prefix, star, time_str)
+                        label = self._make_smart_label(
+                            content, project_common_prefix, star, time_str, project_prefix_re
+                        )
                         session_node.add_leaf(label, data=prompt["id"])
 
     def _find_common_prefix(self, prompts: list[dict]) -> str:
@@ -965,16 +1024,12 @@ class PromptManagerApp(App):
         if not contents:
             return ""
 
-        # Find common prefix
-        prefix = contents[0]
-        for content in contents[1:]:
-            while prefix and not content.startswith(prefix):
-                prefix = prefix[:-1]
-            if not prefix:
-                break
+        # Find common prefix (commonprefix compares only the lexicographic min and
+        # max, instead of shrinking a candidate one character at a time).
+        prefix = os.path.commonprefix(contents)
 
         # Only use prefix if it's significant (>30 chars)
-        if len(prefix) < 30:
+        if len(prefix) < _COMMON_PREFIX_MIN_CHARS:
             return ""
 
         # Check that at least 50% of prompts have meaningful unique content
@@ -985,14 +1040,26 @@ class PromptManagerApp(App):
 
         return prefix
 
-    def _make_smart_label(self, content: str, common_prefix: str, star: str, time_str: str) -> str:
-        """Create smart label with optional two-line display."""
+    def _make_smart_label(
+        self,
+        content: str,
+        common_prefix: str,
+        star: str,
+        time_str: str,
+        prefix_re: Optional[re.Pattern] = None,
+    ) -> str:
+        """Create smart label with optional two-line display.
+
+        `prefix_re` matches `common_prefix` plus leading whitespace and captures the
+        first 35 chars of the unique remainder, so no intermediate slices are built.
+        """
         flat = content.replace("\n", " ")
 
-        if common_prefix and flat.startswith(common_prefix):
+        match = prefix_re.match(flat) if prefix_re is not None else None
+        if match:
             # Show truncated prefix + unique part
             prefix_display = common_prefix[:20] + "..." if len(common_prefix) > 20 else common_prefix
-            unique_part = flat[len(common_prefix):].strip()[:35]
+            unique_part = match.group(1).rstrip()
             if unique_part:
                 return f"{star}[dim]{time_str}[/] [dim]{prefix_display}[/]\n    → {unique_part}"
 
@@ -1011,15 +1078,23 @@ class PromptManagerApp(App):
         self.query_one("#stats-bar", Static).update(stats_text)
 
     def update_preview(self, prompt: Optional[dict]) -> None:
-        """Update the preview panel with prompt and response."""
+        """Update the preview panel with prompt and response.
+
+        Re-showing the prompt that is already displayed (e.g. after a star toggle)
+        only refreshes the star indicators instead of rebuilding the pane.
+        """
         self.selected_prompt = prompt
+        if prompt is not None and prompt.get("id") == self._preview_prompt_id:
+            if self._refresh_preview_star(prompt):
+                return
+
         container = self.query_one("#preview-container", Container)
 
-        # Remove old content safely
-        for child in list(container.children):
-            child.remove()
+        # Tear down old content in one batched removal
+        container.remove_children()
 
         if prompt is None:
+            self._preview_prompt_id = None
             container.mount(Static("Select a prompt to preview", classes="empty-hint"))
             return
 
@@ -1050,10 +1125,21 @@ class PromptManagerApp(App):
         ]
 
         if response:
+            if prompt.get("response_truncated"):
+                # Responses too large to store inline (mostly tool chatter) arrive as a
+                # cut-off preview, which would be broken Markdown anyway; render plain
+                # text and leave full Markdown to the detail view.
+                response_scroll = VerticalScroll(
+                    Static(Text(response)),
+                    Static("[dim]… Response truncated — press Enter for full[/]"),
+                    classes="response-content",
+                )
+            else:
+                response_scroll = VerticalScroll(Markdown(response), classes="response-content")
             widgets.extend([
                 Rule(),
                 Static("[b]Response:[/]", classes="section-label"),
-                VerticalScroll(Markdown(response), classes="response-content"),
+                response_scroll,
             ])
 
         widgets.append(
@@ -1067,6 +1153,20 @@ class PromptManagerApp(App):
         )
 
         container.mount(Vertical(*widgets, classes="preview-inner"))
+        self._preview_prompt_id = prompt.get("id")
+
+    def _refresh_preview_star(self, prompt: dict) -> bool:
+        """Update star title/button of the mounted preview; False if it isn't mounted."""
+        try:
+            title = self.query_one("#preview-container .preview-title", Static)
+            button = self.query_one("#preview-container .btn-star", Button)
+        except Exception:
+            return False
+        starred = bool(prompt.get("starred"))
+        star_str = "[yellow]*[/] " if starred else ""
+        title.update(f"{star_str}[b]{prompt.get('source') or 'unknown'}[/]")
+        button.label = "Unstar" if starred else "Star"
+        return True
 
     def action_refresh(self) -> None:
         self.load_prompts()
@@ -1123,9 +1223,9 @@ class PromptManagerApp(App):
             pass
         self.conn = get_connection()
 
-        self.load_prompts()
-        self.update_stats()
-        self.update_preview(None)
+        with self.batch_update():
+            self.update_stats()
+            self._apply_filter_state()
 
         failed = int(counts.get("files_failed") or 0)
         if rebuild:
@@ -1185,9 +1285,7 @@ class PromptManagerApp(App):
         self.query_one("#search-input", Input).value = ""
         self.current_filter = None
         self.starred_only = False
-        self._update_filter_buttons()
-        self.load_prompts()
-        self.update_preview(None)
+        self._apply_filter_state()
 
     def action_copy_selected(self) -> None:
         if self.selected_prompt:
@@ -1214,9 +1312,17 @@ class PromptManagerApp(App):
     def _set_filter(self, source: Optional[str], starred: bool = False) -> None:
         self.current_filter = source
         self.starred_only = starred
-        self._update_filter_buttons()
-        self.load_prompts()
-        self.update_preview(None)
+        self._apply_filter_state()
+
+    def _apply_filter_state(self, *, reload: bool = True) -> None:
+        """Reload the list, filter buttons and preview as a single repaint."""
+        # NOTE: filter changes do not alter totals, so stats are intentionally not
+        # refreshed here; only sync/rebuild, refresh and star toggles call update_stats().
+        with self.batch_update():
+            if reload:
+                self.load_prompts()
+            self._update_filter_buttons()
+            self.update_preview(None)
 
     def _update_filter_buttons(self) -> None:
         buttons = {
@@ -1265,21 +1371,42 @@ class PromptManagerApp(App):
     @on(Input.Changed, "#search-input")
     def on_search_changed(self, event: Input.Changed) -> None:
         self.search_query = event.value
-
-        if self._search_timer is not None:
+        self._search_worker(event.value)
+
+    @work(exclusive=True, group="search")
+    async def _search_worker(self, query: str) -> None:
+        """Debounce typing, then scan the database off the UI thread.
+
+        Each keystroke starts a new exclusive worker, which cancels the pending one.
+        Cancelling cannot stop the fetch thread, so the scan is interrupted as well,
+        keeping at most one search scan in flight.
+        """
+        await asyncio.sleep(_SEARCH_DEBOUNCE_SECONDS)
+        source, starred_only = self.current_filter, self.starred_only
+        # DuckDB connections are not shared across threads; use a cursor.
+        cursor = self.conn.cursor()
+
+        def fetch() -> list[dict]:
             try:
-                self._search_timer.stop()
-            except Exception:
-                pass
-            self._search_timer = None
-
-        # Debounce database scans while typing.
-        self._search_timer = self.set_timer(0.25, self._apply_search)
+                return self._fetch_prompts(cursor, query, source, starred_only)
+            finally:
+                cursor.close()
 
-    def _apply_search(self) -> None:
-        self._search_timer = None
-        self.load_prompts()
-        self.update_preview(None)
+        try:
+            prompts = await asyncio.to_thread(fetch)
+        except asyncio.CancelledError:
+            try:
+                cursor.interrupt()
+            except duckdb.Error:
+                pass  # The fetch already finished and closed the cursor.
+            raise
+        if (self.search_query, self.current_filter, self.starred_only) != (query, source, starred_only):
+            # The filter changed mid-fetch and its own reload already shows the
+            # current state; these rows would overwrite it with stale results.
+            return
+        with self.batch_update():
+            self._apply_loaded_prompts(prompts)
+            self._apply_filter_state(reload=False)
 
     @on(Tree.NodeSelected, "#prompt-tree")
     def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
@@ -1419,10 +1546,6 @@ class PromptManagerApp(App):
         if not os.path.isdir(work_dir):
             work_dir = os.path.expanduser("~")
 
-        pretty_cmd = f"cd {shlex.quote(work_dir)} && " + " ".join(
-            shlex.quote(str(part)) for part in cmd
-        )
-
         try:
             # Launch in new terminal
             self._launch_in_terminal(cmd, work_dir)
@@ -1435,6 +1558,7 @@ class PromptManagerApp(App):
             else:
                 self.notify(f"Launching {source} in {work_dir}")
         except Exception as e:
+            pretty_cmd = "cd " + shlex.quote(work_dir) + " && " + shlex.join(str(part) for part in cmd)
             try:
                 pyperclip.copy(pretty_cmd)
                 self.notify(
@@ -1451,7 +1575,7 @@ class PromptManagerApp(App):
             return " ".join(shlex.quote(str(part)) for part in argv)
 
         def applescript_string(text: str) -> str:
-            return text.replace("\\", "\\\\").replace('"', '\\"')
+            return text.translate(_APPLESCRIPT_ESCAPES)
 
         def popen_detached(argv: list[str]) -> None:
             kwargs = {"stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
@@ -1460,6 +1584,13 @@ class PromptManagerApp(App):
             except TypeError:
                 subprocess.Popen(argv, **kwargs)
 
+        def launch_direct() -> bool:
+            for exe, prefix in _DIRECT_TERMINALS:
+                if shutil.which(exe):
+                    popen_detached([part.format(cwd=work_dir) for part in prefix] + list(cmd))
+                    return True
+            return False
+
         shell_cmd = f"cd {shlex.quote(work_dir)} && {shell_join(cmd)}"
 
         # If we're inside tmux, prefer opening a new tmux window/tab.
@@ -1471,46 +1602,17 @@ class PromptManagerApp(App):
         if system == "Darwin":
             term_program = os.environ.get("TERM_PROGRAM", "")
             if term_program and term_program not in {"Apple_Terminal", "iTerm.app"}:
-                direct = [
-                    ("wezterm", ["wezterm", "start", "--cwd", work_dir, "--", *cmd]),
-                    ("kitty", ["kitty", "--directory", work_dir, *cmd]),
-                    ("alacritty", ["alacritty", "--working-directory", work_dir, "-e", *cmd]),
-                ]
-                for exe, term_cmd in direct:
-                    if shutil.which(exe):
-                        popen_detached(term_cmd)
-                        return
-            if term_program == "iTerm.app":
-                script = f'''
-                tell application "iTerm"
-                    activate
-                    create window with default profile
-                    tell current session of current window
-                        write text "{applescript_string(shell_cmd)}"
-                    end tell
-                end tell
-                '''
-            else:
-                script = f'''
-                tell application "Terminal"
-                    activate
-                    do script "{applescript_string(shell_cmd)}"
-                end tell
-                '''
+                if launch_direct():
+                    return
+            template = _ITERM_TEMPLATE if term_program == "iTerm.app" else _TERMINAL_TEMPLATE
+            script = template.substitute(cmd=applescript_string(shell_cmd))
             popen_detached(["osascript", "-e", script])
             return
 
         if system == "Linux":
             # Prefer modern terminals that support passing argv directly when available.
-            direct = [
-                ("wezterm", ["wezterm", "start", "--cwd", work_dir, "--", *cmd]),
-                ("kitty", ["kitty", "--directory", work_dir, *cmd]),
-                ("alacritty", ["alacritty", "--working-directory", work_dir, "-e", *cmd]),
-            ]
-            for exe, term_cmd in direct:
-                if shutil.which(exe):
-                    popen_detached(term_cmd)
-                    return
+            if launch_direct():
+                return
 
             # Fallback to terminals that require a shell string.
             bash_cmd = f"{shell_cmd}; exec bash"
@@ -1,8 +1,8 @@
-import json
 import tempfile
 import unittest
 from pathlib import Path
 
+from prompt_manager._json import write_jsonl
 from prompt_manager.codex_transcript import format_codex_rollout_transcript
 
 
@@ -87,7 +87,7 @@ class TestCodexTranscript(unittest.TestCase):
                     },
                 },
             ]
-            rollout.write_text("\n".join(json.dumps(x) for x in lines), encoding="utf-8")
+            write_jsonl(rollout, lines)
 
             out = format_codex_rollout_transcript(rollout, width=80)
 
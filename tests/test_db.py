@@ -1,198 +1,399 @@
 import json
+import os
 import tempfile
 import unittest
+import zlib
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from unittest import mock
 
 import duckdb
 
+from prompt_manager import db
+from prompt_manager._json import write_jsonl
 from prompt_manager.db import (
     _init_schema,
     get_prompt,
+    get_prompt_preview,
     insert_prompt,
+    insert_prompts_bulk,
+    refresh_fts_index,
     search_prompt_summaries,
     search_prompt_summaries_balanced,
 )
 
+# Large payloads are built once per process rather than per test.
+_LONG_CONTENT = "x" * 130_000
+_LONG_RESPONSE = "r" * 50_000
+_BIG_TURN_JSON = "[" + ",".join(['{"k":"v"}'] * 20_000) + "]"
+_BIG_TURN_JSON_BYTES = _BIG_TURN_JSON.encode("utf-8")
+_AMP_THREAD_BYTES = json.dumps(
+    {
+        "id": "T-1",
+        "messages": [
+            {"role": "user", "messageId": 0, "content": [{"type": "text", "text": "hi"}]},
+            {"role": "assistant", "messageId": 1, "content": [{"type": "text", "text": "ok"}]},
+            {"role": "user", "messageId": 2, "content": [{"type": "tool_result"}]},
+            {"role": "assistant", "messageId": 3, "content": [{"type": "text", "text": "done"}]},
+        ],
+    },
+    ensure_ascii=False,
+).encode("utf-8")
+
 
 class TestDuckDbSchema(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.conn = duckdb.connect(":memory:")
+        _init_schema(cls.conn)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.conn.close()
+
+    def setUp(self) -> None:
+        self.conn.execute("DELETE FROM prompts")
+
     def test_drops_content_index_and_allows_long_content(self) -> None:
-        conn = duckdb.connect(":memory:")
+        for scenario in ("preexisting_index", "no_index"):
+            with self.subTest(scenario=scenario):
+                # Mutates the schema, so it runs on a private connection.
+                conn = duckdb.connect(":memory:")
+                try:
+                    _init_schema(conn)
+
+                    if scenario == "preexisting_index":
+                        # Simulate legacy installations that created a content index
+                        # and predate schema versioning.
+                        conn.execute("CREATE INDEX idx_prompts_content ON prompts(content)")
+                        conn.execute("DROP TABLE _schema_meta")
+                        _init_schema(conn)
+
+                    count = conn.execute(
+                        "SELECT COUNT(*) FROM duckdb_indexes() "
+                        "WHERE table_name='prompts' AND index_name='idx_prompts_content'"
+                    ).fetchone()[0]
+                    self.assertEqual(count, 0)
+
+                    inserted = insert_prompt(conn, id="p1", source="codex", content=_LONG_CONTENT)
+                    self.assertTrue(inserted)
+                finally:
+                    conn.close()
+
+    def test_init_schema_is_noop_when_version_is_current(self) -> None:
+        self.conn.execute("CREATE INDEX idx_prompts_content ON prompts(content)")
         try:
-            _init_schema(conn)
-
-            # Simulate legacy installations that created a content index.
-            conn.execute("CREATE INDEX idx_prompts_content ON prompts(content)")
-            _init_schema(conn)
-
-            index_names = [
-                row[0]
-                for row in conn.execute(
-                    "SELECT index_name FROM duckdb_indexes() WHERE table_name='prompts'"
-                ).fetchall()
-            ]
-            self.assertNotIn("idx_prompts_content", index_names)
-
-            long_content = "x" * 130_000
-            inserted = insert_prompt(conn, id="p1", source="codex", content=long_content)
-            self.assertTrue(inserted)
+            _init_schema(self.conn)
+            count = self.conn.execute(
+                "SELECT COUNT(*) FROM duckdb_indexes() WHERE index_name = 'idx_prompts_content'"
+            ).fetchone()[0]
+            self.assertEqual(count, 1)
         finally:
-            conn.close()
+            self.conn.execute("DROP INDEX idx_prompts_content")
 
     def test_search_prompt_summaries_truncates_and_omits_response(self) -> None:
-        conn = duckdb.connect(":memory:")
-        try:
-            _init_schema(conn)
-            insert_prompt(
-                conn,
-                id="p1",
-                source="codex",
-                content="hello world",
-                response="should not be returned",
-            )
-            insert_prompt(
-                conn,
-                id="p2",
-                source="codex",
-                content="x" * 1000,
-                response="also hidden",
-            )
+        insert_prompt(
+            self.conn,
+            id="p1",
+            source="codex",
+            content="hello world",
+            response="should not be returned",
+        )
+        insert_prompt(
+            self.conn,
+            id="p2",
+            source="codex",
+            content="x" * 1000,
+            response="also hidden",
+        )
 
-            rows = search_prompt_summaries(conn, query="hello", limit=10, snippet_len=5)
-            self.assertEqual(len(rows), 1)
-            self.assertEqual(rows[0]["id"], "p1")
-            self.assertLessEqual(len(rows[0]["content"]), 5)
-            self.assertNotIn("response", rows[0])
-        finally:
-            conn.close()
+        rows = search_prompt_summaries(self.conn, query="hello", limit=10, snippet_len=5)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], "p1")
+        self.assertLessEqual(len(rows[0]["content"]), 5)
+        self.assertNotIn("response", rows[0])
 
     def test_balanced_summaries_include_each_source(self) -> None:
-        conn = duckdb.connect(":memory:")
-        try:
-            _init_schema(conn)
-            now = datetime.now(tz=timezone.utc)
-
-            # Many codex rows dominate recency.
-            for idx in range(200):
-                insert_prompt(
-                    conn,
-                    id=f"cx{idx}",
-                    source="codex",
-                    content=f"codex {idx}",
-                    timestamp=now + timedelta(seconds=idx),
-                )
+        now = datetime.now(tz=timezone.utc)
 
-            insert_prompt(
-                conn,
-                id="cu1",
-                source="cursor",
-                content="cursor prompt",
-                timestamp=now - timedelta(days=1),
-            )
-            insert_prompt(
-                conn,
-                id="cc1",
-                source="claude_code",
-                content="claude prompt",
-                timestamp=now - timedelta(days=2),
-            )
-            insert_prompt(
-                conn,
-                id="gm1",
-                source="gemini_cli",
-                content="gemini prompt",
-                timestamp=now - timedelta(days=3),
-            )
+        # Many codex rows dominate recency.
+        insert_prompts_bulk(
+            self.conn,
+            [
+                {
+                    "id": f"cx{idx}",
+                    "source": "codex",
+                    "content": f"codex {idx}",
+                    "timestamp": now + timedelta(seconds=idx),
+                }
+                for idx in range(200)
+            ],
+        )
 
-            recent = search_prompt_summaries(conn, limit=50)
-            self.assertEqual({row["source"] for row in recent}, {"codex"})
+        insert_prompt(
+            self.conn,
+            id="cu1",
+            source="cursor",
+            content="cursor prompt",
+            timestamp=now - timedelta(days=1),
+        )
+        insert_prompt(
+            self.conn,
+            id="cc1",
+            source="claude_code",
+            content="claude prompt",
+            timestamp=now - timedelta(days=2),
+        )
+        insert_prompt(
+            self.conn,
+            id="gm1",
+            source="gemini_cli",
+            content="gemini prompt",
+            timestamp=now - timedelta(days=3),
+        )
 
-            balanced = search_prompt_summaries_balanced(
-                conn,
-                sources=["claude_code", "cursor", "codex", "gemini_cli"],
-                per_source_limit=10,
-            )
-            sources = {row["source"] for row in balanced}
-            self.assertIn("codex", sources)
-            self.assertIn("cursor", sources)
-            self.assertIn("claude_code", sources)
-            self.assertIn("gemini_cli", sources)
-        finally:
-            conn.close()
+        recent = search_prompt_summaries(self.conn, limit=50)
+        self.assertEqual({row["source"] for row in recent}, {"codex"})
+
+        balanced = search_prompt_summaries_balanced(
+            self.conn,
+            sources=["claude_code", "cursor", "codex", "gemini_cli"],
+            per_source_limit=10,
+        )
+        sources = {row["source"] for row in balanced}
+        self.assertLessEqual({"codex", "cursor", "claude_code", "gemini_cli"}, sources)
+
+    def test_bulk_insert_skips_existing_ids(self) -> None:
+        insert_prompt(self.conn, id="p1", source="codex", content="existing")
+
+        inserted = insert_prompts_bulk(
+            self.conn,
+            [
+                {"id": "p1", "source": "codex", "content": "replacement"},
+                {"id": "p2", "source": "codex", "content": "new", "response": _LONG_RESPONSE},
+                {"id": "p2", "source": "codex", "content": "duplicate"},
+            ],
+        )
+        self.assertEqual(inserted, 1)
+
+        self.assertEqual(get_prompt(self.conn, "p1")["content"], "existing")
+        row = get_prompt(self.conn, "p2")
+        self.assertEqual(row["content"], "new")
+        self.assertEqual(row["response"], _LONG_RESPONSE)
 
     def test_large_fields_are_stored_compressed_and_roundtrip(self) -> None:
-        conn = duckdb.connect(":memory:")
-        try:
-            _init_schema(conn)
-            response = "r" * 50_000
-            turn_json = "[" + ",".join(["{\"k\":\"v\"}"] * 20_000) + "]"
+        inserted = insert_prompt(
+            self.conn,
+            id="p1",
+            source="codex",
+            content="hello world",
+            response=_LONG_RESPONSE,
+            turn_json_bytes=_BIG_TURN_JSON_BYTES,
+        )
+        self.assertTrue(inserted)
+
+        stored = self.conn.execute(
+            "SELECT response, response_blob, turn_json, turn_json_blob FROM prompts WHERE id = ?",
+            ["p1"],
+        ).fetchone()
+        self.assertIsNotNone(stored)
+        self.assertIsNotNone(stored[1])  # response_blob
+        self.assertIsNotNone(stored[3])  # turn_json_blob
+        # Highly repetitive payloads must actually be compressed (zlib or zstd).
+        self.assertLess(len(stored[1]), 5000)
+        self.assertLess(len(stored[3]), len(_BIG_TURN_JSON_BYTES) // 20)
+
+        row = get_prompt(self.conn, "p1")
+        self.assertIsNotNone(row)
+        self.assertEqual(row["response"], _LONG_RESPONSE)
+        self.assertEqual(row["turn_json"].encode("utf-8"), _BIG_TURN_JSON_BYTES)
+
+    def test_zstd_is_opt_in_and_unreadable_blobs_are_reported(self) -> None:
+        insert_prompt(self.conn, id="p1", source="codex", content="a", response=_LONG_RESPONSE)
+        blob = self.conn.execute("SELECT response_blob FROM prompts WHERE id = 'p1'").fetchone()[0]
+        self.assertFalse(blob.startswith(db._ZSTD_MAGIC))
+
+        if db.zstandard is None:
+            self.skipTest("zstandard is not installed")
+        with mock.patch.dict("os.environ", {"PROMPT_MANAGER_ZSTD": "1"}):
+            insert_prompt(self.conn, id="p2", source="codex", content="b", response=_LONG_RESPONSE)
+        self.assertEqual(get_prompt(self.conn, "p2")["response"], _LONG_RESPONSE)
 
-            inserted = insert_prompt(
-                conn,
+        db._warn_once.cache_clear()
+        with mock.patch.object(db, "zstandard", None), self.assertLogs(level="WARNING") as logs:
+            row = get_prompt(self.conn, "p2")
+        self.assertIn("zstandard is not installed", "\n".join(logs.output))
+        self.assertLess(len(row["response"]), len(_LONG_RESPONSE))
+
+    def test_prompt_preview_flags_truncated_responses(self) -> None:
+        insert_prompt(self.conn, id="p1", source="codex", content="a", response="short reply")
+        insert_prompt(self.conn, id="p2", source="codex", content="b", response=_LONG_RESPONSE)
+
+        short = get_prompt_preview(self.conn, "p1")
+        self.assertEqual((short["response"], short["response_truncated"]), ("short reply", False))
+        long = get_prompt_preview(self.conn, "p2")
+        self.assertTrue(long["response_truncated"])
+        self.assertEqual(long["response"], _LONG_RESPONSE[: db._RESPONSE_PREVIEW_CHARS])
+
+    def test_legacy_zlib_blobs_still_decode(self) -> None:
+        insert_prompt(self.conn, id="p1", source="codex", content="hello world")
+        self.conn.execute(
+            "UPDATE prompts SET response_blob = ? WHERE id = ?",
+            [zlib.compress(_LONG_RESPONSE.encode("utf-8")), "p1"],
+        )
+
+        row = get_prompt(self.conn, "p1")
+        self.assertEqual(row["response"], _LONG_RESPONSE)
+
+    def test_amp_turn_json_hydrates_from_origin_indices(self) -> None:
+        db._parse_amp_thread_cached.cache_clear()
+        with tempfile.TemporaryDirectory() as tmp:
+            thread = Path(tmp) / "T-1.json"
+            thread.write_bytes(_AMP_THREAD_BYTES)
+            insert_prompt(
+                self.conn,
                 id="p1",
-                source="codex",
-                content="hello world",
-                response=response,
-                turn_json=turn_json,
+                source="amp",
+                content="hi",
+                session_id="T-1",
+                origin_path=str(thread),
+                origin_offset_start=0,
+                origin_offset_end=3,
+                response="ok",
+                turn_json=None,
             )
-            self.assertTrue(inserted)
-
-            stored = conn.execute(
-                "SELECT response, response_blob, turn_json, turn_json_blob FROM prompts WHERE id = ?",
-                ["p1"],
-            ).fetchone()
-            self.assertIsNotNone(stored)
-            self.assertIsNotNone(stored[1])  # response_blob
-            self.assertIsNotNone(stored[3])  # turn_json_blob
-
-            row = get_prompt(conn, "p1")
-            self.assertIsNotNone(row)
-            self.assertEqual(row["response"], response)
-            self.assertEqual(row["turn_json"], turn_json)
-        finally:
-            conn.close()
 
-    def test_amp_turn_json_hydrates_from_origin_indices(self) -> None:
-        conn = duckdb.connect(":memory:")
-        try:
-            _init_schema(conn)
-            with tempfile.TemporaryDirectory() as tmp:
-                thread_path = Path(tmp) / "T-1.json"
-                thread_path.write_text(
-                    json.dumps(
-                        {
-                            "id": "T-1",
-                            "messages": [
-                                {"role": "user", "messageId": 0, "content": [{"type": "text", "text": "hi"}]},
-                                {"role": "assistant", "messageId": 1, "content": [{"type": "text", "text": "ok"}]},
-                                {"role": "user", "messageId": 2, "content": [{"type": "tool_result"}]},
-                                {"role": "assistant", "messageId": 3, "content": [{"type": "text", "text": "done"}]},
-                            ],
-                        },
-                        ensure_ascii=False,
-                    ),
-                    encoding="utf-8",
-                )
-
-                insert_prompt(
-                    conn,
-                    id="p1",
-                    source="amp",
-                    content="hi",
-                    session_id="T-1",
-                    origin_path=str(thread_path),
-                    origin_offset_start=0,
-                    origin_offset_end=3,
-                    response="ok",
-                    turn_json=None,
-                )
-
-                row = get_prompt(conn, "p1")
+            with mock.patch("prompt_manager.db._open_thread", wraps=db._open_thread) as open_thread:
+                row = get_prompt(self.conn, "p1")
                 self.assertIsNotNone(row)
                 turn = json.loads(row.get("turn_json") or "null")
                 self.assertIsInstance(turn, list)
                 self.assertEqual(len(turn), 3)
                 self.assertEqual(turn[0].get("role"), "user")
                 self.assertEqual(turn[1].get("role"), "assistant")
-        finally:
-            conn.close()
+
+                # Unchanged file: served from the parse cache.
+                self.assertEqual(get_prompt(self.conn, "p1")["turn_json"], row["turn_json"])
+                self.assertEqual(open_thread.call_count, 1)
+
+                # A new mtime invalidates the cached parse.
+                mtime_ns = thread.stat().st_mtime_ns
+                thread.write_bytes(_AMP_THREAD_BYTES.replace(b'"hi"', b'"hello"'))
+                os.utime(thread, ns=(mtime_ns + 1_000_000_000, mtime_ns + 1_000_000_000))
+                turn = json.loads(get_prompt(self.conn, "p1")["turn_json"])
+                self.assertEqual(open_thread.call_count, 2)
+                self.assertEqual(turn[0]["content"][0]["text"], "hello")
+
+    def test_codex_turn_json_hydrates_from_origin_offsets(self) -> None:
+        # U+2028 is legal unescaped inside JSON strings and must not split a record.
+        events = [
+            {"type": "event_msg", "payload": {"type": "user_message", "message": "a\u2028b"}},
+            {"type": "event_msg", "payload": {"type": "agent_message", "message": "ok"}},
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            rollout = Path(tmp) / "rollout.jsonl"
+            write_jsonl(rollout, events)
+            insert_prompt(
+                self.conn,
+                id="p1",
+                source="codex",
+                content="a b",
+                origin_path=str(rollout),
+                origin_offset_start=0,
+                origin_offset_end=rollout.stat().st_size,
+                turn_json=None,
+            )
+            row = get_prompt(self.conn, "p1")
+        self.assertEqual(json.loads(row["turn_json"]), events)
+
+
+class TestFullTextSearch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.conn = duckdb.connect(":memory:")
+        if not db._load_fts_extension(cls.conn, install=True):
+            cls.conn.close()
+            raise unittest.SkipTest("DuckDB fts extension is not available")
+        _init_schema(cls.conn)
+        insert_prompt(cls.conn, id="p1", source="codex", content="refactor the sync parser")
+        insert_prompt(cls.conn, id="p2", source="codex", content="fix the failing tests")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.conn.close()
+
+    def test_whole_words_use_index_and_partial_words_fall_back(self) -> None:
+        with mock.patch.dict("os.environ", {"PROMPT_MANAGER_FTS": "1"}):
+            self.assertTrue(refresh_fts_index(self.conn))
+            cases = {
+                # Out of order: only the token index matches this.
+                "parser refactor": ["p1"],
+                # Partial and short terms are substring matches.
+                "pars": ["p1"],
+                "te": ["p2"],
+            }
+            for query, expected in cases.items():
+                with self.subTest(query=query):
+                    rows = search_prompt_summaries(self.conn, query=query)
+                    self.assertEqual([row["id"] for row in rows], expected)
+
+
+class _RecordingConnection:
+    """Fails every statement, recording it (the `fts` extension is not installed)."""
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def execute(self, sql: str, *_args):
+        self.statements.append(sql)
+        raise duckdb.IOException("extension not found")
+
+
+class TestFullTextSearchFallback(unittest.TestCase):
+    """Runs the FTS query against a stand-in `match_bm25`, so no extension is needed."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.conn = duckdb.connect(":memory:")
+        _init_schema(cls.conn)
+        insert_prompt(cls.conn, id="p1", source="codex", content="refactor the sync parser")
+        insert_prompt(cls.conn, id="p2", source="codex", content="fix the failing tests")
+        # Whole-word, all-terms matching like the real index (NULL when no match).
+        cls.conn.execute("CREATE SCHEMA fts_main_prompts")
+        cls.conn.execute(
+            """
+            CREATE MACRO fts_main_prompts.match_bm25(docname, query_string, conjunctive := 0) AS
+            CASE WHEN list_has_all(
+                (SELECT string_split(lower(p.content), ' ') FROM prompts p WHERE p.id = docname),
+                string_split(lower(query_string), ' ')
+            ) THEN 1.0 END
+            """
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.conn.close()
+
+    def test_index_query_and_substring_fallback(self) -> None:
+        cases = {
+            "parser refactor": ["p1"],  # Out of order: only the index query matches.
+            "pars": ["p1"],  # No whole-word hit: substring fallback.
+            "te": ["p2"],  # Too short for the index.
+        }
+        env = {"PROMPT_MANAGER_FTS": "1"}
+        with mock.patch.dict("os.environ", env), mock.patch.object(
+            db, "_load_fts_extension", return_value=True
+        ):
+            for query, expected in cases.items():
+                with self.subTest(query=query):
+                    rows = search_prompt_summaries(self.conn, query=query)
+                    self.assertEqual([row["id"] for row in rows], expected)
+
+    def test_search_never_installs_and_remembers_load_failures(self) -> None:
+        conn = _RecordingConnection()
+        self.assertFalse(db._load_fts_extension(conn))
+        self.assertFalse(db._load_fts_extension(conn))
+        self.assertEqual(conn.statements, ["LOAD fts"])
+
+        self.assertFalse(db._load_fts_extension(conn, install=True))
+        self.assertEqual(conn.statements, ["LOAD fts", "LOAD fts", "INSTALL fts"])
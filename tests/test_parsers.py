@@ -1,9 +1,13 @@
+import base64
 import json
 import sqlite3
 import tempfile
 import unittest
+from datetime import datetime, timezone
 from pathlib import Path
 
+from prompt_manager._json import write_jsonl
+from prompt_manager.parsers import BaseParser
 from prompt_manager.parsers.claude_code import ClaudeCodeParser
 from prompt_manager.parsers.codex import CodexParser
 from prompt_manager.parsers.cursor import CursorParser
@@ -11,6 +15,19 @@ from prompt_manager.parsers.amp import AmpParser
 from prompt_manager.parsers.gemini_cli import GeminiCliParser
 
 
+class TestParseTimestamp(unittest.TestCase):
+    def test_parses_rfc3339_and_fallback_formats(self) -> None:
+        cases = {
+            "2025-10-14T12:00:00.000Z": datetime(2025, 10, 14, 12, 0, tzinfo=timezone.utc),
+            "2025-10-14T12:00:00.250+00:00": datetime(2025, 10, 14, 12, 0, 0, 250000, tzinfo=timezone.utc),
+            "2025-10-14T12-00-00": datetime(2025, 10, 14, 12, 0),
+            "not a timestamp": None,
+        }
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                self.assertEqual(BaseParser.parse_timestamp(value), expected)
+
+
 class TestGeminiCliParser(unittest.TestCase):
     def test_parses_session_json(self) -> None:
         parser = GeminiCliParser()
@@ -66,11 +83,10 @@ class TestGeminiCliParser(unittest.TestCase):
             self.assertEqual(prompts[0].session_id, "sess1")
             self.assertEqual(prompts[0].content, "User prompt long enough")
             self.assertEqual(prompts[0].response, "First answer\nSecond answer")
-            self.assertIsNotNone(prompts[0].turn_json)
-            turn0 = json.loads(prompts[0].turn_json or "[]")
-            self.assertEqual([m.get("id") for m in turn0], ["m1", "m2", "m3"])
-            turn1 = json.loads(prompts[1].turn_json or "[]")
-            self.assertEqual([m.get("id") for m in turn1], ["m4", "m5"])
+            self.assertEqual([m.get("id") for m in prompts[0].turn or []], ["m1", "m2", "m3"])
+            self.assertEqual([m.get("id") for m in prompts[1].turn or []], ["m4", "m5"])
+            # `turn_json` is serialized lazily from the in-memory timeline.
+            self.assertEqual(json.loads(prompts[0].turn_json or "[]"), prompts[0].turn)
 
 
 class TestClaudeCodeParser(unittest.TestCase):
@@ -117,7 +133,7 @@ class TestClaudeCodeParser(unittest.TestCase):
                     },
                 },
             ]
-            log_path.write_text("\n".join(json.dumps(x) for x in lines), encoding="utf-8")
+            write_jsonl(log_path, lines)
 
             prompts = list(parser.parse_file(log_path))
             self.assertEqual(len(prompts), 2)
@@ -175,7 +191,7 @@ class TestClaudeCodeParser(unittest.TestCase):
                     },
                 },
             ]
-            log_path.write_text("\n".join(json.dumps(x) for x in lines), encoding="utf-8")
+            write_jsonl(log_path, lines)
 
             prompts = list(parser.parse_file(log_path))
             self.assertEqual(len(prompts), 1)
@@ -183,6 +199,46 @@ class TestClaudeCodeParser(unittest.TestCase):
             self.assertEqual(prompts[0].response, "Assistant response")
             self.assertFalse((prompts[0].project_path or "").startswith("//"))
 
+    def test_meta_lines_stay_in_turn_timeline_without_starting_prompts(self) -> None:
+        parser = ClaudeCodeParser()
+        with tempfile.TemporaryDirectory() as tmp:
+            log_dir = Path(tmp) / "-Users-test-project"
+            log_dir.mkdir(parents=True)
+            log_path = log_dir / "session.jsonl"
+
+            lines = [
+                {"type": "user", "message": {"role": "user", "content": "Actual prompt long enough"}},
+                {"type": "user", "isMeta": True, "message": {"role": "user", "content": "Caveat text long enough"}},
+                {"type": "assistant", "message": {"role": "assistant", "content": "Assistant response"}},
+            ]
+            # Compact separators, as Claude Code writes them.
+            log_path.write_text(
+                "".join(json.dumps(x, separators=(",", ":")) + "\n" for x in lines),
+                encoding="utf-8",
+            )
+
+            prompts = list(parser.parse_file(log_path))
+            self.assertEqual(len(prompts), 1)
+            self.assertEqual(prompts[0].response, "Assistant response")
+            turn = json.loads(prompts[0].turn_json or "[]")
+            self.assertEqual([event.get("isMeta") for event in turn], [None, True, None])
+
+            # A CRLF-terminated meta line is kept; a corrupt one is dropped rather
+            # than breaking the turn's JSON.
+            encoded = [json.dumps(x, separators=(",", ":")) for x in lines]
+            log_path.write_bytes(
+                (
+                    encoded[0] + "\n"
+                    + encoded[1] + "\r\n"
+                    + '{"type":"user","isMeta":true,"message":{\n'
+                    + encoded[2] + "\n"
+                ).encode("utf-8")
+            )
+            prompts = list(parser.parse_file(log_path))
+            self.assertEqual(len(prompts), 1)
+            turn = json.loads(prompts[0].turn_json or "[]")
+            self.assertEqual([event.get("isMeta") for event in turn], [None, True, None])
+
 
 class TestCodexParser(unittest.TestCase):
     def test_parses_short_user_messages_and_preserves_turn_timeline(self) -> None:
@@ -264,7 +320,7 @@ class TestCodexParser(unittest.TestCase):
                     },
                 },
             ]
-            rollout.write_text("\n".join(json.dumps(x) for x in lines), encoding="utf-8")
+            write_jsonl(rollout, lines)
 
             prompts = list(parser.parse_file(rollout))
             self.assertEqual(len(prompts), 2)
@@ -284,6 +340,35 @@ class TestCodexParser(unittest.TestCase):
             self.assertNotIn("short2", seg0)
             self.assertIn("short2", seg1)
 
+    def test_falls_back_to_response_items_without_user_events(self) -> None:
+        parser = CodexParser(base_path=Path("/does/not/matter"))
+        with tempfile.TemporaryDirectory() as tmp:
+            rollout = Path(tmp) / "rollout.jsonl"
+            lines = [
+                {
+                    "timestamp": "2025-06-01T10:00:00.000Z",
+                    "type": "response_item",
+                    "payload": {
+                        "type": "message",
+                        "role": "user",
+                        "content": [{"type": "input_text", "text": "legacy prompt"}],
+                    },
+                },
+                {
+                    "timestamp": "2025-06-01T10:00:01.000Z",
+                    "type": "response_item",
+                    "payload": {
+                        "type": "message",
+                        "role": "assistant",
+                        "content": [{"type": "output_text", "text": "legacy reply"}],
+                    },
+                },
+            ]
+            write_jsonl(rollout, lines)
+
+            prompts = list(parser.parse_file(rollout))
+            self.assertEqual([(p.content, p.response) for p in prompts], [("legacy prompt", "legacy reply")])
+
     def test_ignores_invalid_legacy_rollout_json(self) -> None:
         parser = CodexParser(base_path=Path("/does/not/matter"))
         with tempfile.TemporaryDirectory() as tmp:
@@ -444,6 +529,21 @@ class TestCursorStateVscdbParser(unittest.TestCase):
             self.assertEqual(prompt.content, "User prompt long enough")
             self.assertEqual(prompt.response, "Assistant reply\nMore reply")
 
+    def test_decodes_plain_and_base64_kv_values(self) -> None:
+        parser = CursorParser()
+        payload = {"bubbleId": "b1", "text": "héllo"}
+        encoded = json.dumps(payload).encode("utf-8")
+        values = (
+            encoded,
+            b"\n  " + encoded,
+            base64.b64encode(encoded),
+            base64.b64encode(encoded).decode("ascii"),
+        )
+        for value in values:
+            with self.subTest(value=value):
+                self.assertEqual(parser._decode_kv_json(value), payload)
+        self.assertIsNone(parser._decode_kv_json(b"\x00\x01 not json"))
+
 
 class TestCursorLegacyStoreDbParser(unittest.TestCase):
     def test_inferrs_unknown_roles_and_builds_turn_json(self) -> None:
@@ -500,6 +600,12 @@ class TestCursorLegacyStoreDbParser(unittest.TestCase):
             self.assertEqual(prompts[1].content, "Second user prompt long enough")
             self.assertEqual(prompts[1].response, "Second assistant response")
 
-            self.assertIsNotNone(prompts[0].turn_json)
-            turn0 = json.loads(prompts[0].turn_json or "[]")
-            self.assertEqual([m.get("blob_id") for m in turn0], ["b1", "b2"])
+            self.assertEqual([m.get("blob_id") for m in prompts[0].turn or []], ["b1", "b2"])
+
+    def test_decodes_hex_and_plain_legacy_meta(self) -> None:
+        parser = CursorParser()
+        meta = {"name": "Chat", "createdAt": "2025-10-14T12:00:00.000Z"}
+        encoded = json.dumps(meta).encode("utf-8")
+        for value in (encoded.hex(), encoded.hex().encode("ascii"), encoded, encoded.decode("utf-8")):
+            with self.subTest(value=value):
+                self.assertEqual(parser._decode_legacy_meta(value), meta)
@@ -1,12 +1,19 @@
+import contextlib
+import io
 import tempfile
 import unittest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from unittest import mock
 
 import duckdb
 
+from prompt_manager._json import write_jsonl
 from prompt_manager.db import _init_schema
 from prompt_manager.parsers import BaseParser, ParsedPrompt
-from prompt_manager.sync import sync_all
+from prompt_manager.parsers.claude_code import ClaudeCodeParser
+from prompt_manager.sync import _init_file_state_table, sync_all
 
 
 class _DummyParser(BaseParser):
@@ -28,30 +35,196 @@ class _DummyParser(BaseParser):
         )
 
 
+class _ResponseParser(_DummyParser):
+    def parse_file(self, _file_path: Path):
+        for idx in range(3):
+            yield ParsedPrompt(
+                id=self.generate_id(self.source_name, f"hello {idx}", "sess", "t0"),
+                source=self.source_name,
+                content=f"hello {idx}",
+                session_id="sess",
+                response=f"reply {idx}",
+            )
+
+
+class _RepeatedIdParser(_DummyParser):
+    """Yields one prompt twice; only the later copy carries the response."""
+
+    def parse_file(self, _file_path: Path):
+        prompt_id = self.generate_id(self.source_name, "hello", "sess", "t0")
+        yield ParsedPrompt(id=prompt_id, source=self.source_name, content="hello", session_id="sess")
+        yield ParsedPrompt(
+            id=prompt_id,
+            source=self.source_name,
+            content="hello",
+            session_id="sess",
+            response="reply",
+        )
+
+
+class _TwoFileParser(_DummyParser):
+    """Lists a second file whose parse fails."""
+
+    def __init__(self, file_path: Path, bad_path: Path):
+        super().__init__(file_path, sync_version=1)
+        self._bad_path = bad_path
+
+    def find_log_files(self):
+        yield self._file_path
+        yield self._bad_path
+
+    def parse_file(self, file_path: Path):
+        if file_path == self._bad_path:
+            raise ValueError("corrupt log")
+        yield from super().parse_file(file_path)
+
+
+def _write_claude_logs(base: Path, files: int) -> None:
+    project = base / "-tmp-proj"
+    project.mkdir()
+    for file_idx in range(files):
+        rows = []
+        for turn in range(2):
+            rows.append(
+                {
+                    "type": "user",
+                    "message": {"role": "user", "content": f"Prompt {file_idx}.{turn} long enough"},
+                    "timestamp": "2025-10-14T12:00:00.000Z",
+                }
+            )
+            rows.append({"type": "assistant", "message": {"role": "assistant", "content": "Assistant reply"}})
+        write_jsonl(project / f"s{file_idx}.jsonl", rows)
+
+
+class _BrokenPool:
+    """Stands in for ProcessPoolExecutor: the first job's worker dies, then the pool is broken."""
+
+    def __init__(self, **_kwargs):
+        self.submitted = 0
+
+    def submit(self, *_args):
+        self.submitted += 1
+        if self.submitted > 1:
+            raise BrokenProcessPool("pool is broken")
+        future: Future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, **_kwargs):
+        pass
+
+
 class TestSyncVersion(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.conn = duckdb.connect(":memory:")
+        _init_schema(cls.conn)
+        _init_file_state_table(cls.conn)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.conn.close()
+
+    def setUp(self) -> None:
+        self.conn.execute("DELETE FROM prompts")
+        self.conn.execute("DELETE FROM file_sync_state")
+
     def test_sync_version_triggers_resync_for_unchanged_files(self) -> None:
-        conn = duckdb.connect(":memory:")
-        try:
-            _init_schema(conn)
-            with tempfile.TemporaryDirectory() as tmp:
-                file_path = Path(tmp) / "log.txt"
-                file_path.write_text("data", encoding="utf-8")
+        conn = self.conn
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = Path(tmp) / "log.txt"
+            file_path.write_text("data", encoding="utf-8")
 
-                counts1 = sync_all(conn, parsers=[_DummyParser(file_path, sync_version=1)])
-                self.assertEqual(counts1["files_updated"], 1)
+            counts1 = sync_all(conn, parsers=[_DummyParser(file_path, sync_version=1)])
+            self.assertEqual(counts1["files_updated"], 1)
 
-                counts2 = sync_all(conn, parsers=[_DummyParser(file_path, sync_version=1)])
-                self.assertEqual(counts2["files_updated"], 0)
+            counts2 = sync_all(conn, parsers=[_DummyParser(file_path, sync_version=1)])
+            self.assertEqual(counts2["files_updated"], 0)
 
-                counts3 = sync_all(conn, parsers=[_DummyParser(file_path, sync_version=2)])
-                self.assertEqual(counts3["files_updated"], 1)
+            counts3 = sync_all(conn, parsers=[_DummyParser(file_path, sync_version=2)])
+            self.assertEqual(counts3["files_updated"], 1)
 
-                counts4 = sync_all(conn, parsers=[_DummyParser(file_path, sync_version=2)])
-                self.assertEqual(counts4["files_updated"], 0)
-        finally:
-            conn.close()
+            counts4 = sync_all(conn, parsers=[_DummyParser(file_path, sync_version=2)])
+            self.assertEqual(counts4["files_updated"], 0)
+
+    def test_resync_counts_new_prompts_and_backfills_missing_fields(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = Path(tmp) / "log.txt"
+            file_path.write_text("data", encoding="utf-8")
+
+            counts1 = sync_all(self.conn, parsers=[_ResponseParser(file_path, sync_version=1)])
+            self.assertEqual(counts1["total"], 3)
+
+            self.conn.execute("UPDATE prompts SET response = NULL, origin_path = NULL")
+            counts2 = sync_all(self.conn, force=True, parsers=[_ResponseParser(file_path, sync_version=1)])
+            self.assertEqual(counts2["total"], 0)
+
+            rows = self.conn.execute(
+                "SELECT content, response, origin_path FROM prompts ORDER BY content"
+            ).fetchall()
+            self.assertEqual(
+                rows,
+                [(f"hello {idx}", f"reply {idx}", str(file_path)) for idx in range(3)],
+            )
+
+    def test_repeated_id_in_one_file_backfills_the_first_copy(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = Path(tmp) / "log.txt"
+            file_path.write_text("data", encoding="utf-8")
+
+            counts = sync_all(self.conn, parsers=[_RepeatedIdParser(file_path, sync_version=1)])
+            self.assertEqual(counts["total"], 1)
+            rows = self.conn.execute("SELECT content, response FROM prompts").fetchall()
+            self.assertEqual(rows, [("hello", "reply")])
+
+    def test_failed_files_are_not_recorded_as_synced(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = Path(tmp) / "log.txt"
+            bad_path = Path(tmp) / "bad.txt"
+            file_path.write_text("data", encoding="utf-8")
+            bad_path.write_text("data", encoding="utf-8")
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                counts1 = sync_all(self.conn, parsers=[_TwoFileParser(file_path, bad_path)])
+                counts2 = sync_all(self.conn, parsers=[_TwoFileParser(file_path, bad_path)])
+            self.assertEqual((counts1["files_updated"], counts1["files_failed"]), (2, 1))
+            # Only the failed file is retried.
+            self.assertEqual((counts2["files_updated"], counts2["files_skipped"]), (1, 1))
+
+            paths = self.conn.execute("SELECT file_path FROM file_sync_state").fetchall()
+            self.assertEqual(paths, [(str(file_path),)])
+
+    def _sync_claude_logs(self, files: int) -> dict:
+        with tempfile.TemporaryDirectory() as tmp:
+            _write_claude_logs(Path(tmp), files)
+            return sync_all(self.conn, parsers=[ClaudeCodeParser(base_path=Path(tmp))])
+
+    def test_parse_workers_sync_every_file(self) -> None:
+        # Spawned workers import the parser afresh; only in-process parsing is patched.
+        in_process = mock.patch.object(
+            ClaudeCodeParser, "parse_file", side_effect=AssertionError("parsed in-process")
+        )
+        with mock.patch.dict("os.environ", {"PROMPT_MANAGER_SYNC_WORKERS": "2"}), in_process:
+            counts = self._sync_claude_logs(files=5)
+        self.assertEqual((counts["files_updated"], counts["files_failed"]), (5, 0))
+        self.assertEqual(counts["total"], 10)
+        stored = self.conn.execute(
+            "SELECT COUNT(*), COUNT(response), COUNT(turn_json) FROM prompts"
+        ).fetchone()
+        self.assertEqual(stored, (10, 10, 10))
+
+    def test_broken_worker_pool_falls_back_to_in_process_parsing(self) -> None:
+        with mock.patch.dict("os.environ", {"PROMPT_MANAGER_SYNC_WORKERS": "2"}), mock.patch(
+            "prompt_manager.sync.ProcessPoolExecutor", _BrokenPool
+        ):
+            counts = self._sync_claude_logs(files=3)
+        self.assertEqual((counts["files_updated"], counts["files_failed"]), (3, 0))
+        self.assertEqual(counts["total"], 6)
+        stored = self.conn.execute("SELECT COUNT(*), COUNT(turn_json) FROM prompts").fetchone()
+        self.assertEqual(stored, (6, 6))
 
     def test_file_sync_state_schema_migrates_sync_version(self) -> None:
+        # Creates a legacy file_sync_state table, so it runs on a private connection.
         conn = duckdb.connect(":memory:")
         try:
             _init_schema(conn)
@@ -94,12 +267,7 @@ class TestSyncVersion(unittest.TestCase):
                 # Should never be called when the file doesn't exist.
                 raise AssertionError("parse_file should not be called for missing files")
 
-        conn = duckdb.connect(":memory:")
-        try:
-            _init_schema(conn)
-            missing = Path("/tmp/pm-missing-file-does-not-exist-12345.log")
-            counts = sync_all(conn, force=True, parsers=[MissingParser(missing)])
-            self.assertEqual(int(counts.get("files_failed") or 0), 0)
-            self.assertEqual(int(counts.get("files_skipped") or 0), 1)
-        finally:
-            conn.close()
+        missing = Path("/tmp/pm-missing-file-does-not-exist-12345.log")
+        counts = sync_all(self.conn, force=True, parsers=[MissingParser(missing)])
+        self.assertEqual(int(counts.get("files_failed") or 0), 0)
+        self.assertEqual(int(counts.get("files_skipped") or 0), 1)